@@ -2,7 +2,14 @@ import uvicorn
 
 def main():
     """Run the FastAPI server"""
-    uvicorn.run("src.app:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run(
+        "src.app:app",
+        host="0.0.0.0",
+        port=8000,
+        reload=True,
+        loop="uvloop",
+        http="httptools",
+    )
 
 
 if __name__ == "__main__":
@@ -267,6 +267,10 @@ class CostCalculatorAgent:
 
     async def calculate_authoritative_cost(self, selections: List[str]) -> float:
         """Calculate authoritative cost from backend database (ignores frontend values)."""
+        return await self.calculate_authoritative_cost_cents(selections) / 100
+
+    async def calculate_authoritative_cost_cents(self, selections: List[str]) -> int:
+        """Calculate authoritative cost in integer cents (ignores frontend values)."""
         total_cost = 0.0
 
         for selection in selections:
@@ -282,4 +286,4 @@ class CostCalculatorAgent:
         # Apply basic markup
         total_cost *= 1.15  # 15% markup
 
-        return round(total_cost, 2)
+        return round(total_cost * 100)
@@ -10,6 +10,7 @@ from fastapi import FastAPI, UploadFile, File, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
+import src.settings as settings
 from src.agents.orchestrator import IceCreamGameOrchestrator
 from src.models.game_data import GameData, PlayerData
 from src.models.processing_result import ProcessingResult, GameProcessingResult
@@ -54,7 +55,7 @@ app = FastAPI(
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Configure appropriately for production
+    allow_origin_regex=settings.CORS_ORIGIN_REGEX,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -0,0 +1,15 @@
+"""Response classes shared by the FastAPI application and routers."""
+
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class FastJSONResponse(JSONResponse):
+    """orjson-backed JSON response that also accepts non-str keys and numpy values."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
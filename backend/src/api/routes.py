@@ -1,23 +1,33 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
-import aiosqlite
-import json
-from typing import List, Dict, Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import FileResponse, Response
+import logging
+import orjson
+from typing import Callable, List, Dict, Any, Optional
 from pydantic import BaseModel
+from dataclasses import asdict
 from datetime import datetime
 from pathlib import Path
-from src.settings import DB_FILE
+from src.database import inventory_cache
+from src.database.connection import get_db
+from src.api.json_body import json_body, json_body_openapi
+from src.api.responses import FastJSONResponse
 from src.agents.orchestrator import IceCreamGameOrchestrator
-from src.tools.image_generator import ImageGeneratorTool
+from src.tools.image_generator import get_image_generator, get_memory_image
 from src.agents.cost_calculator import CostCalculatorAgent
 from src.agents.selection_mapping import SelectionMappingAgent
 from src.storage import session_memory
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Generated images live in the backend root (routes.py is at backend/src/api/routes.py).
+# Resolved once at import so serving an image needs a single resolve() per request.
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+IMAGE_SUFFIXES = frozenset({".png", ".jpg", ".jpeg", ".gif", ".webp"})
 
 # Initialize orchestrator, image generator, and cost calculator
 orchestrator = IceCreamGameOrchestrator(use_langgraph=True)
-image_generator = ImageGeneratorTool()
+image_generator = get_image_generator()
 cost_calculator = CostCalculatorAgent()
 
 # Track image generation requests per session/player to prevent duplicates
@@ -92,9 +102,9 @@ async def health_check():
     """Health check endpoint for system status"""
     try:
         # Check database connectivity
-        async with aiosqlite.connect(DB_FILE) as db:
-            cursor = await db.execute("SELECT COUNT(*) FROM inventory")
-            ingredient_count = (await cursor.fetchone())[0]
+        db = await get_db()
+        cursor = await db.execute("SELECT COUNT(*) FROM inventory")
+        ingredient_count = (await cursor.fetchone())[0]
 
         return {
             "status": "healthy",
@@ -224,6 +234,14 @@ class InventoryUpdateRequest(BaseModel):
     operation: str = "decrease"  # "decrease", "increase", "set"
 
 
+# Maps an inventory operation to a function of (previous, quantity) -> new quantity
+INVENTORY_OPERATIONS: Dict[str, Callable[[int, int], int]] = {
+    "decrease": lambda previous, quantity: max(0, previous - quantity),
+    "increase": lambda previous, quantity: previous + quantity,
+    "set": lambda previous, quantity: quantity,
+}
+
+
 class InventoryUpdateResponse(BaseModel):
     success: bool
     ingredient: str
@@ -249,120 +267,94 @@ class CostValidationResponse(BaseModel):
     error: str = None
 
 
-@router.get("/ingredients", response_model=List[IngredientResponse])
-async def get_all_ingredients():
+@router.get("/ingredients", responses={200: {"model": List[IngredientResponse]}})
+async def get_all_ingredients(request: Request):
     """Get all ingredients from the database"""
     try:
-        async with aiosqlite.connect(DB_FILE) as db:
-            cursor = await db.execute("""
-                SELECT ingredient, description, used_on, allergies, quantity, 
-                       cost_min, cost_max, inventory 
-                FROM inventory
-            """)
-            rows = await cursor.fetchall()
-
-            ingredients = []
-            for row in rows:
-                # Parse JSON arrays safely
-                try:
-                    used_on = json.loads(row[2]) if row[2] else []
-                except json.JSONDecodeError:
-                    used_on = []
-
-                try:
-                    allergies = json.loads(row[3]) if row[3] else []
-                except json.JSONDecodeError:
-                    allergies = []
-
-                ingredient = IngredientResponse(
-                    ingredient=row[0],
-                    description=row[1] or "",
-                    used_on=used_on,
-                    allergies=allergies,
-                    quantity=row[4] or "",
-                    cost_min=row[5],
-                    cost_max=row[6],
-                    inventory=row[7],
-                )
-                ingredients.append(ingredient)
-
-            return ingredients
+        # Rows already match IngredientResponse and are encoded once per snapshot
+        content, etag = await inventory_cache.get_ingredients_json()
+        # Clients revalidate every time; unchanged inventory costs a bare 304
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if_none_match = request.headers.get("if-none-match", "")
+        if etag in (tag.strip() for tag in if_none_match.split(",")):
+            return Response(status_code=304, headers=headers)
+        return Response(content=content, media_type="application/json", headers=headers)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 
-@router.post("/final-reveal")
-async def save_final_reveal(request: FinalRevealRequest):
+@router.post("/final-reveal", openapi_extra=json_body_openapi(FinalRevealRequest))
+async def save_final_reveal(
+    request: FinalRevealRequest = Depends(json_body(FinalRevealRequest)),
+):
     """Save the final ice cream creation data (legacy single player endpoint)"""
     try:
         # Here you can save the final data to database, log it, or process it
         # For now, we'll just log it and return a success response
 
-        print(f"Final ice cream created by {request.player_name}:")
-        print(f"Character: {request.character}")
-        print(f"Ice cream data: {request.ice_cream_data}")
-        print(f"Ingredients used: {request.ingredients_used}")
-        print(f"Total cost: {request.total_cost}")
+        logger.info(
+            "Final ice cream created by %s (character: %s, total cost: %s)",
+            request.player_name,
+            request.character,
+            request.total_cost,
+        )
+        logger.debug(
+            "Ice cream data: %s | Ingredients used: %s",
+            request.ice_cream_data,
+            request.ingredients_used,
+        )
 
-        return {
-            "status": "success",
-            "message": "Ice cream creation saved successfully!",
-            "data": {
-                "player_name": request.player_name,
-                "character": request.character,
-                "ingredients_count": len(request.ingredients_used),
-                "total_cost": request.total_cost,
-            },
-        }
+        return FastJSONResponse(
+            {
+                "status": "success",
+                "message": "Ice cream creation saved successfully!",
+                "data": {
+                    "player_name": request.player_name,
+                    "character": request.character,
+                    "ingredients_count": len(request.ingredients_used),
+                    "total_cost": request.total_cost,
+                },
+            }
+        )
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error saving data: {str(e)}")
 
 
-@router.post("/game-results")
-async def save_game_results(request: GameResultRequest):
+@router.post("/game-results", openapi_extra=json_body_openapi(GameResultRequest))
+async def save_game_results(
+    http_request: Request,
+    request: GameResultRequest = Depends(json_body(GameResultRequest)),
+):
     """Save complete game results - accepts exact same JSON format as download"""
     try:
-        # Convert the request to the exact same format as the frontend generates
-        game_data = {
-            "gameDate": request.gameDate,
-            "players": request.players,
-            "totalPlayers": request.totalPlayers,
-            "gameVersion": request.gameVersion,
-        }
-
-        # Log the complete game data for debugging
-        print(f"\n{'=' * 60}")
-        print(f"COMPLETE GAME RESULTS RECEIVED - {request.gameDate}")
-        print(f"{'=' * 60}")
-        print(f"Total Players: {request.totalPlayers}")
-        print(f"Game Version: {request.gameVersion}")
-        print(f"{'=' * 60}")
-
-        # Process and log each player's data
-        for i, player in enumerate(request.players, 1):
-            player_name = player.get("name", f"Player {i}")
-            personality = player.get("personality", {})
-            selections = player.get("selections", [])
-            total_cost = player.get("totalCost", 0)
-            ai_interactions = player.get("aiInteractions", [])
-            ingredients_used = [s for s in selections if s != "Skip"]
-
-            print(f"\nPlayer {i}: {player_name}")
-            print(f"  ID: {player.get('id', 'N/A')}")
-            print(f"  Personality: {personality.get('name', 'Unknown')}")
-            print(f"  Personality Emoji: {personality.get('emoji', '❓')}")
-            print(f"  Selections: {', '.join(selections)}")
-            print(
-                f"  Ingredients Used: {', '.join(ingredients_used) if ingredients_used else 'None'}"
-            )
-            print(f"  Total Cost: ${total_cost}")
-            print(f"  AI Interactions: {len(ai_interactions)}")
+        logger.info(
+            "Game results received - %s (%d players, version %s)",
+            request.gameDate,
+            request.totalPlayers,
+            request.gameVersion,
+        )
 
-        print(f"\n{'=' * 60}")
-        print("Game data successfully processed and saved!")
-        print(f"{'=' * 60}\n")
+        # Per-player dumps are debug-only; skip building them otherwise
+        if logger.isEnabledFor(logging.DEBUG):
+            skip = "Skip"
+            for i, player in enumerate(request.players, 1):
+                personality = player.get("personality", {})
+                selections = player.get("selections", [])
+                logger.debug(
+                    "Player %d: %s | ID: %s | Personality: %s %s | Selections: %s"
+                    " | Ingredients Used: %s | Total Cost: $%s | AI Interactions: %d",
+                    i,
+                    player.get("name", f"Player {i}"),
+                    player.get("id", "N/A"),
+                    personality.get("name", "Unknown"),
+                    personality.get("emoji", "❓"),
+                    ", ".join(selections),
+                    ", ".join(s for s in selections if s != skip) or "None",
+                    player.get("totalCost", 0),
+                    len(player.get("aiInteractions", [])),
+                )
 
         # Here you could save to database, send to analytics, etc.
         # For example:
@@ -370,18 +362,24 @@ async def save_game_results(request: GameResultRequest):
         #     await db.execute("""
         #         INSERT INTO game_sessions (game_date, players_data, created_at)
         #         VALUES (?, ?, datetime('now'))
-        #     """, (request.gameDate, json.dumps(game_data)))
+        #     """, (request.gameDate, await http_request.body()))
         #     await db.commit()
 
-        # Return the exact same data structure that was sent, confirming it was saved
-        return {
-            "status": "success",
-            "message": f"Game results saved successfully for {request.totalPlayers} players!",
-            "data": game_data,  # Return the exact same structure that was sent
-        }
+        # Echo the validated body bytes back as-is, confirming it was saved
+        message = orjson.dumps(
+            f"Game results saved successfully for {request.totalPlayers} players!"
+        )
+        return Response(
+            content=b'{"status":"success","message":'
+            + message
+            + b',"data":'
+            + await http_request.body()
+            + b"}",
+            media_type="application/json",
+        )
 
     except Exception as e:
-        print(f"Error processing game results: {str(e)}")
+        logger.exception("Error processing game results")
         raise HTTPException(
             status_code=500, detail=f"Error saving game results: {str(e)}"
         )
@@ -587,7 +585,7 @@ async def generate_ice_cream_image(request: ImageGenerationRequest):
 
         # Generate image using the image generator tool
         try:
-            image_url, local_path, success = image_generator.generate_ice_cream_image(
+            image_url, local_path, success = await image_generator.generate_pooled(
                 ingredients=ingredients,
                 scoops=min(len(ingredients), 3),  # Max 3 scoops
                 save_to_root=True,
@@ -715,7 +713,7 @@ async def generate_ice_cream_image_on_demand(player: str, session_id: str = None
 
         # Generate image using the image generator tool
         try:
-            image_url, local_path, success = image_generator.generate_ice_cream_image(
+            image_url, local_path, success = await image_generator.generate_pooled(
                 ingredients=ingredients,
                 scoops=min(len(ingredients), 3),  # Max 3 scoops
                 save_to_root=True,
@@ -838,7 +836,11 @@ async def get_selection_mappings():
 # ===== PHASE 3.3 - COST CALCULATION INTEGRATION ENDPOINTS =====
 
 
-@router.post("/real-time-pricing", response_model=RealTimePricingResponse)
+@router.post(
+    "/real-time-pricing",
+    response_model=RealTimePricingResponse,
+    response_class=FastJSONResponse,
+)
 async def get_real_time_pricing(request: RealTimePricingRequest):
     """Calculate real-time pricing for player selections"""
     try:
@@ -856,43 +858,40 @@ async def get_real_time_pricing(request: RealTimePricingRequest):
                 error="No valid selections provided for pricing",
             )
 
-        # Calculate authoritative cost using backend cost calculator
-        total_cost = await cost_calculator.calculate_authoritative_cost(
+        # Calculate authoritative cost using backend cost calculator.
+        # Prices are kept in integer cents and converted to dollars only in the response.
+        total_cents = await cost_calculator.calculate_authoritative_cost_cents(
             valid_selections
         )
+        total_cost = total_cents / 100
 
         # Get itemized costs for each selection
         itemized_costs = {}
-        breakdown = {
-            "baseCost": 0.0,
-            "ingredientCosts": {},
-            "preparationCost": 0.0,
-            "markupApplied": 0.0,
-            "serviceFee": 0.0,
-        }
+        base_cents = 0
 
         # Calculate individual costs for transparency
         for selection in valid_selections:
             try:
-                individual_cost = await cost_calculator.calculate_authoritative_cost(
-                    [selection]
+                individual_cents = (
+                    await cost_calculator.calculate_authoritative_cost_cents(
+                        [selection]
+                    )
                 )
-                itemized_costs[selection] = round(individual_cost, 2)
-                breakdown["ingredientCosts"][selection] = round(individual_cost, 2)
             except Exception as e:
                 print(f"⚠️ Warning calculating cost for {selection}: {str(e)}")
-                itemized_costs[selection] = 2.50  # Fallback cost
-                breakdown["ingredientCosts"][selection] = 2.50
+                individual_cents = 250  # Fallback cost
+            itemized_costs[selection] = individual_cents / 100
+            base_cents += individual_cents
 
         # Add breakdown details
-        breakdown["baseCost"] = sum(breakdown["ingredientCosts"].values())
-        breakdown["preparationCost"] = max(
-            1.0, len(valid_selections) * 0.50
-        )  # $0.50 per ingredient
-        breakdown["serviceFee"] = 1.50  # Standard service fee
-        breakdown["markupApplied"] = (
-            total_cost - breakdown["baseCost"] - breakdown["preparationCost"]
-        )
+        preparation_cents = max(100, len(valid_selections) * 50)  # $0.50 per ingredient
+        breakdown = {
+            "baseCost": base_cents / 100,
+            "ingredientCosts": itemized_costs,
+            "preparationCost": preparation_cents / 100,
+            "markupApplied": (total_cents - base_cents - preparation_cents) / 100,
+            "serviceFee": 1.50,  # Standard service fee
+        }
 
         warnings = []
         if len(valid_selections) > 4:
@@ -929,7 +928,7 @@ async def get_real_time_pricing(request: RealTimePricingRequest):
 
         return RealTimePricingResponse(
             success=True,
-            totalCost=round(total_cost, 2),
+            totalCost=total_cost,
             itemizedCosts=itemized_costs,
             breakdown=breakdown,
             warnings=warnings,
@@ -946,6 +945,14 @@ async def get_real_time_pricing(request: RealTimePricingRequest):
 @router.post("/update-inventory", response_model=InventoryUpdateResponse)
 async def update_ingredient_inventory(request: InventoryUpdateRequest):
     """Update ingredient inventory in real-time"""
+    # Validate the operation once, before touching the database
+    apply_operation = INVENTORY_OPERATIONS.get(request.operation)
+    if apply_operation is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid operation. Use 'decrease', 'increase', or 'set'",
+        )
+
     try:
         print(
             f"📦 Updating inventory for {request.ingredient}: {request.operation} {request.quantity}"
@@ -968,51 +975,42 @@ async def update_ingredient_inventory(request: InventoryUpdateRequest):
 
                 # Update inventory for each mapped ingredient
                 results = []
-                async with aiosqlite.connect(DB_FILE) as db:
-                    for ingredient in actual_ingredients:
-                        # Get current inventory for this specific ingredient
-                        cursor = await db.execute(
-                            "SELECT inventory FROM inventory WHERE ingredient = ?",
-                            (ingredient,),
+                db = await get_db()
+                for ingredient in actual_ingredients:
+                    # Get current inventory for this specific ingredient
+                    cursor = await db.execute(
+                        "SELECT inventory FROM inventory WHERE ingredient = ?",
+                        (ingredient,),
+                    )
+                    result = await cursor.fetchone()
+
+                    if result:
+                        previous_quantity = result[0]
+
+                        # Calculate new quantity based on operation
+                        new_quantity = apply_operation(
+                            previous_quantity, request.quantity
+                        )
+
+                        # Update database
+                        await db.execute(
+                            "UPDATE inventory SET inventory = ? WHERE ingredient = ?",
+                            (new_quantity, ingredient),
+                        )
+                        await db.commit()
+                        inventory_cache.set_inventory(ingredient, new_quantity)
+
+                        results.append(
+                            {
+                                "ingredient": ingredient,
+                                "previous": previous_quantity,
+                                "new": new_quantity,
+                            }
+                        )
+
+                        print(
+                            f"✅ Updated {ingredient}: {previous_quantity} → {new_quantity}"
                         )
-                        result = await cursor.fetchone()
-
-                        if result:
-                            previous_quantity = result[0]
-
-                            # Calculate new quantity based on operation
-                            if request.operation == "decrease":
-                                new_quantity = max(
-                                    0, previous_quantity - request.quantity
-                                )
-                            elif request.operation == "increase":
-                                new_quantity = previous_quantity + request.quantity
-                            elif request.operation == "set":
-                                new_quantity = request.quantity
-                            else:
-                                raise HTTPException(
-                                    status_code=400,
-                                    detail="Invalid operation. Use 'decrease', 'increase', or 'set'",
-                                )
-
-                            # Update database
-                            await db.execute(
-                                "UPDATE inventory SET inventory = ? WHERE ingredient = ?",
-                                (new_quantity, ingredient),
-                            )
-                            await db.commit()
-
-                            results.append(
-                                {
-                                    "ingredient": ingredient,
-                                    "previous": previous_quantity,
-                                    "new": new_quantity,
-                                }
-                            )
-
-                            print(
-                                f"✅ Updated {ingredient}: {previous_quantity} → {new_quantity}"
-                            )
 
                 # Return summary of first ingredient updated (for API compatibility)
                 if results:
@@ -1029,70 +1027,61 @@ async def update_ingredient_inventory(request: InventoryUpdateRequest):
             )
 
         # Fallback: Direct ingredient lookup (original logic)
-        async with aiosqlite.connect(DB_FILE) as db:
-            # Get current inventory
+        db = await get_db()
+        # Get current inventory
+        cursor = await db.execute(
+            "SELECT inventory FROM inventory WHERE ingredient = ?",
+            (request.ingredient,),
+        )
+        result = await cursor.fetchone()
+
+        if not result:
+            # Try to find by partial match for frontend-backend mapping
             cursor = await db.execute(
-                "SELECT inventory FROM inventory WHERE ingredient = ?",
-                (request.ingredient,),
+                "SELECT ingredient, inventory FROM inventory WHERE ingredient LIKE ?",
+                (f"%{request.ingredient}%",),
             )
             result = await cursor.fetchone()
 
             if not result:
-                # Try to find by partial match for frontend-backend mapping
+                # Try case-insensitive search
                 cursor = await db.execute(
-                    "SELECT ingredient, inventory FROM inventory WHERE ingredient LIKE ?",
+                    "SELECT ingredient, inventory FROM inventory WHERE LOWER(ingredient) LIKE LOWER(?)",
                     (f"%{request.ingredient}%",),
                 )
                 result = await cursor.fetchone()
 
                 if not result:
-                    # Try case-insensitive search
+                    print("🔍 Available ingredients in database:")
                     cursor = await db.execute(
-                        "SELECT ingredient, inventory FROM inventory WHERE LOWER(ingredient) LIKE LOWER(?)",
-                        (f"%{request.ingredient}%",),
+                        "SELECT ingredient FROM inventory LIMIT 5"
                     )
-                    result = await cursor.fetchone()
+                    available = await cursor.fetchall()
+                    for ing in available:
+                        print(f"  - {ing[0]}")
 
-                    if not result:
-                        print("🔍 Available ingredients in database:")
-                        cursor = await db.execute(
-                            "SELECT ingredient FROM inventory LIMIT 5"
-                        )
-                        available = await cursor.fetchall()
-                        for ing in available:
-                            print(f"  - {ing[0]}")
+                    raise HTTPException(
+                        status_code=404,
+                        detail=f"Ingredient '{request.ingredient}' not found in inventory. This might be an abstract selection that needs proper mapping.",
+                    )
 
-                        raise HTTPException(
-                            status_code=404,
-                            detail=f"Ingredient '{request.ingredient}' not found in inventory. This might be an abstract selection that needs proper mapping.",
-                        )
+            # Update ingredient name to match database
+            actual_ingredient = result[0]
+            previous_quantity = result[1]
+        else:
+            actual_ingredient = request.ingredient
+            previous_quantity = result[0]
 
-                # Update ingredient name to match database
-                actual_ingredient = result[0]
-                previous_quantity = result[1]
-            else:
-                actual_ingredient = request.ingredient
-                previous_quantity = result[0]
-
-            # Calculate new quantity based on operation
-            if request.operation == "decrease":
-                new_quantity = max(0, previous_quantity - request.quantity)
-            elif request.operation == "increase":
-                new_quantity = previous_quantity + request.quantity
-            elif request.operation == "set":
-                new_quantity = request.quantity
-            else:
-                raise HTTPException(
-                    status_code=400,
-                    detail="Invalid operation. Use 'decrease', 'increase', or 'set'",
-                )
+        # Calculate new quantity based on operation
+        new_quantity = apply_operation(previous_quantity, request.quantity)
 
-            # Update database
-            await db.execute(
-                "UPDATE inventory SET inventory = ? WHERE ingredient = ?",
-                (new_quantity, actual_ingredient),
-            )
-            await db.commit()
+        # Update database
+        await db.execute(
+            "UPDATE inventory SET inventory = ? WHERE ingredient = ?",
+            (new_quantity, actual_ingredient),
+        )
+        await db.commit()
+        inventory_cache.set_inventory(actual_ingredient, new_quantity)
 
         print(
             f"✅ Inventory updated: {actual_ingredient} {previous_quantity} → {new_quantity}"
@@ -1112,7 +1101,11 @@ async def update_ingredient_inventory(request: InventoryUpdateRequest):
         )
 
 
-@router.post("/get-ice-cream-suggestions", response_model=Dict[str, Any])
+@router.post(
+    "/get-ice-cream-suggestions",
+    response_model=Dict[str, Any],
+    response_class=FastJSONResponse,
+)
 async def get_ice_cream_suggestions(request: Dict[str, List[str]]):
     """Get probable ice cream names and ingredients based on player selections"""
     try:
@@ -1127,39 +1120,35 @@ async def get_ice_cream_suggestions(request: Dict[str, List[str]]):
         all_suggested_ingredients = []
         ice_cream_names = []
 
-        async with aiosqlite.connect(DB_FILE) as db:
-            # For each selection, find matching ingredients and their ice cream names
-            for selection in valid_selections:
-                try:
-                    mapping_result = await mapping_agent.map_selection_to_components(
-                        selection
-                    )
+        db = await get_db()
+        # For each selection, find matching ingredients and their ice cream names
+        for selection in valid_selections:
+            try:
+                mapping_result = await mapping_agent.map_selection_to_components(
+                    selection
+                )
+
+                if mapping_result and "flavors" in mapping_result:
+                    mapped_flavors = mapping_result.get("flavors", [])
+                    mapped_toppings = mapping_result.get("toppings", [])
+
+                    # Search for ingredients that match the mapped keywords
+                    for keyword in mapped_flavors + mapped_toppings:
+                        # One row per (ingredient, ice cream name) via json_each
+                        cursor = await db.execute(
+                            """SELECT inventory.ingredient, flavour.value
+                               FROM inventory, json_each(inventory.used_on) AS flavour
+                               WHERE inventory.ingredient LIKE ?
+                                 AND json_valid(inventory.used_on)""",
+                            (f"%{keyword}%",),
+                        )
+                        for ingredient, ice_cream_name in await cursor.fetchall():
+                            all_suggested_ingredients.append(ingredient)
+                            ice_cream_names.append(ice_cream_name)
 
-                    if mapping_result and "flavors" in mapping_result:
-                        mapped_flavors = mapping_result.get("flavors", [])
-                        mapped_toppings = mapping_result.get("toppings", [])
-
-                        # Search for ingredients that match the mapped keywords
-                        for keyword in mapped_flavors + mapped_toppings:
-                            cursor = await db.execute(
-                                """SELECT ingredient, used_on FROM inventory 
-                                   WHERE ingredient LIKE ? AND used_on != '[]'""",
-                                (f"%{keyword}%",),
-                            )
-                            results = await cursor.fetchall()
-
-                            for ingredient, used_on_json in results:
-                                all_suggested_ingredients.append(ingredient)
-                                # Parse the JSON array of ice cream names
-                                try:
-                                    used_on_list = json.loads(used_on_json)
-                                    ice_cream_names.extend(used_on_list)
-                                except json.JSONDecodeError:
-                                    continue
-
-                except Exception as mapping_error:
-                    print(f"⚠️ Error mapping selection '{selection}': {mapping_error}")
-                    continue
+            except Exception as mapping_error:
+                print(f"⚠️ Error mapping selection '{selection}': {mapping_error}")
+                continue
 
         # Remove duplicates and get most common ice cream names
         unique_ice_creams = list(dict.fromkeys(ice_cream_names))  # Preserve order
@@ -1298,14 +1287,14 @@ async def get_session_status(session_id: str):
     return SessionStatusResponse(
         session_id=session.session_id,
         status=session.status,
-        created_at=session.created_at.isoformat(),
-        updated_at=session.updated_at.isoformat(),
+        created_at=session.created_at_iso,
+        updated_at=session.updated_at_iso,
         players_count=len(session.players),
-        expires_at=session.expires_at.isoformat(),
+        expires_at=session.expires_at_iso,
     )
 
 
-@router.get("/session/{session_id}/results")
+@router.get("/session/{session_id}/results", response_class=FastJSONResponse)
 async def get_session_results(session_id: str):
     """Get complete session results."""
     session = session_memory.get_session(session_id)
@@ -1316,23 +1305,10 @@ async def get_session_results(session_id: str):
     results = {
         "session_id": session.session_id,
         "status": session.status,
-        "created_at": session.created_at.isoformat(),
-        "players": [],
+        "created_at": session.created_at_iso,
+        "players": [asdict(player) for player in session.players],
     }
 
-    for player in session.players:
-        player_result = {
-            "id": player.id,
-            "name": player.name,
-            "selections": player.selections,
-            "total_cost": player.total_cost,
-            "ai_interactions": player.ai_interactions,
-            "processing_result": player.processing_result,
-            "generated_image_url": player.generated_image_url,
-            "personality": player.personality,
-        }
-        results["players"].append(player_result)
-
     return {"success": True, "data": results}
 
 
@@ -1363,33 +1339,40 @@ async def get_session_stats():
     return {"success": True, "stats": stats}
 
 
+@router.get("/images/mem/{key}.png")
+async def serve_memory_image(key: str):
+    """Serve an image the generator kept in memory instead of saving to disk."""
+    content = get_memory_image(key)
+    if content is None:
+        raise HTTPException(status_code=404, detail=f"Image not found: {key}")
+    return Response(
+        content=content,
+        media_type="image/png",
+        headers={"Cache-Control": "public, max-age=3600"},
+    )
+
+
 @router.get("/images/{filename}")
 async def serve_generated_image(filename: str):
     """Serve generated ice cream images from the backend directory."""
     try:
-        # Get backend root directory (go up 2 levels from routes.py to get to backend/)
-        # routes.py is at: /backend/src/api/routes.py
-        # So we need: parents[2] to get to /backend/
-        backend_root = Path(__file__).resolve().parents[2]
-        image_path = backend_root / filename
+        image_path = (BACKEND_ROOT / filename).resolve()
 
         print(f"🔍 Looking for image: {filename}")
-        print(f"🔍 Backend root: {backend_root}")
         print(f"🔍 Full image path: {image_path}")
-        print(f"🔍 Image exists: {image_path.exists()}")
-
-        # Security check: ensure the file exists and is in the backend directory
-        if not image_path.exists():
-            raise HTTPException(status_code=404, detail=f"Image not found: {filename}")
 
         # Security check: ensure the path is within backend root (prevent path traversal)
-        if not str(image_path.resolve()).startswith(str(backend_root.resolve())):
+        if not image_path.is_relative_to(BACKEND_ROOT):
             raise HTTPException(status_code=403, detail="Access denied")
 
         # Check if it's an image file
-        if image_path.suffix.lower() not in [".png", ".jpg", ".jpeg", ".gif", ".webp"]:
+        if image_path.suffix.lower() not in IMAGE_SUFFIXES:
             raise HTTPException(status_code=400, detail="Invalid image format")
 
+        # Security check: ensure the file exists in the backend directory
+        if not image_path.is_file():
+            raise HTTPException(status_code=404, detail=f"Image not found: {filename}")
+
         print(f"🖼️ Serving image: {image_path}")
         return FileResponse(
             path=str(image_path),
@@ -4,13 +4,18 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 import src.settings
+from src.api.responses import FastJSONResponse
 from src.api.routes import router as api_router
+from src.database.connection import close_db, get_db
 from src.database.load_database import init_db
+from src.logging_setup import setup_logging, shutdown_logging
+from src.tools.image_generator import close_http_session
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    setup_logging()
     print("🚀 Starting AI Canvas Scoops Backend...")
     print("🔧 Environment variables loaded from .env")
 
@@ -30,11 +35,14 @@ async def lifespan(app: FastAPI):
         print("✅ Stability AI API key configured")
 
     await init_db()
+    await get_db()
     print("✅ Application startup complete")
     yield
-    # Shutdown (if needed)
+    # Shutdown
     print("🛑 Shutting down AI Canvas Scoops Backend...")
-    pass
+    await close_db()
+    await close_http_session()
+    shutdown_logging()
 
 
 app = FastAPI(
@@ -42,12 +50,13 @@ app = FastAPI(
     description="Backend API for the AI Canvas Scoops ice cream game",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 # Configure CORS to allow frontend connections
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Allow all origins for development
+    allow_origin_regex=src.settings.CORS_ORIGIN_REGEX,
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
@@ -65,4 +74,13 @@ async def root():
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # uvloop and httptools ship with uvicorn[standard]
+    uvicorn.run(
+        "src.app:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        workers=src.settings.SERVER_WORKERS,
+        access_log=False,
+    )
@@ -0,0 +1,45 @@
+"""Shared aiosqlite connection for the API routes and MCP tools."""
+
+import asyncio
+from typing import Optional
+
+import aiosqlite
+from src.settings import DB_FILE
+
+# Applied once when the shared connection is opened
+CONNECTION_PRAGMAS = """
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-64000;
+"""
+
+# Prepared statements kept by sqlite3 on the shared connection, so repeated
+# queries skip parsing and planning; comfortably above the app's distinct SQL
+STATEMENT_CACHE_SIZE = 128
+
+_db: Optional[aiosqlite.Connection] = None
+_db_lock = asyncio.Lock()
+
+
+async def get_db() -> aiosqlite.Connection:
+    """Return the shared database connection, opening it on first use."""
+    global _db
+    if _db is None:
+        async with _db_lock:
+            if _db is None:
+                db = await aiosqlite.connect(
+                    DB_FILE, cached_statements=STATEMENT_CACHE_SIZE
+                )
+                await db.executescript(CONNECTION_PRAGMAS)
+                _db = db
+    return _db
+
+
+async def close_db() -> None:
+    """Close the shared database connection if it is open."""
+    global _db
+    async with _db_lock:
+        if _db is not None:
+            await _db.close()
+            _db = None
@@ -0,0 +1,109 @@
+"""In-process snapshot of the inventory table for read-heavy lookups.
+
+The table is tiny and only changes through inventory updates, so readers are
+served from memory. Writers in this process update or invalidate the snapshot
+directly; the TTL bounds staleness from writes made by other processes (the
+MCP server and the API run separately).
+"""
+
+import asyncio
+import hashlib
+import time
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+from src.database.connection import get_db
+
+# Seconds before the snapshot is reloaded from the database
+INVENTORY_CACHE_TTL = 30.0
+
+# Flavours and the /ingredients payload are built by sqlite's JSON1 functions,
+# so the used_on/allergies text columns never have to be parsed in Python
+FLAVOURS_QUERY = """
+SELECT DISTINCT flavour.value
+FROM inventory, json_each(inventory.used_on) AS flavour
+WHERE json_valid(inventory.used_on)
+"""
+
+INGREDIENTS_JSON_QUERY = """
+SELECT json_group_array(json_object(
+    'ingredient', ingredient,
+    'description', coalesce(description, ''),
+    'used_on', CASE WHEN json_valid(used_on) THEN json(used_on) ELSE json_array() END,
+    'allergies', CASE WHEN json_valid(allergies) THEN json(allergies) ELSE json_array() END,
+    'quantity', coalesce(quantity, ''),
+    'cost_min', cost_min,
+    'cost_max', cost_max,
+    'inventory', inventory
+))
+FROM inventory
+"""
+
+
+_rows: Optional[Dict[str, Dict[str, Any]]] = None
+_flavours: FrozenSet[str] = frozenset()
+_ingredients_json: Optional[Tuple[bytes, str]] = None
+_loaded_at = 0.0
+_cache_lock = asyncio.Lock()
+
+
+async def _load() -> None:
+    """Load the full inventory table and the distinct flavour set."""
+    global _rows, _flavours, _ingredients_json, _loaded_at
+    db = await get_db()
+    cursor = await db.execute("SELECT * FROM inventory")
+    columns = [column[0] for column in cursor.description]
+    rows = {row[0]: dict(zip(columns, row)) for row in await cursor.fetchall()}
+
+    _rows = rows
+    cursor = await db.execute(FLAVOURS_QUERY)
+    _flavours = frozenset(row[0] for row in await cursor.fetchall())
+    _ingredients_json = None
+    _loaded_at = time.monotonic()
+
+
+async def get_inventory() -> Dict[str, Dict[str, Any]]:
+    """Return the inventory snapshot keyed by ingredient name."""
+    if _rows is None or time.monotonic() - _loaded_at > INVENTORY_CACHE_TTL:
+        async with _cache_lock:
+            if _rows is None or time.monotonic() - _loaded_at > INVENTORY_CACHE_TTL:
+                await _load()
+    return _rows
+
+
+async def get_ingredient_row(ingredient_name: str) -> Optional[Dict[str, Any]]:
+    """Return the raw inventory row for an ingredient, if present."""
+    return (await get_inventory()).get(ingredient_name)
+
+
+async def get_flavours() -> FrozenSet[str]:
+    """Return every ice cream flavour referenced by an ingredient's used_on."""
+    await get_inventory()
+    return _flavours
+
+
+async def get_ingredients_json() -> Tuple[bytes, str]:
+    """Return the JSON array served by /ingredients and its ETag."""
+    global _ingredients_json
+    await get_inventory()
+    if _ingredients_json is None:
+        db = await get_db()
+        cursor = await db.execute(INGREDIENTS_JSON_QUERY)
+        content = (await cursor.fetchone())[0].encode()
+        etag = f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+        _ingredients_json = (content, etag)
+    return _ingredients_json
+
+
+def set_inventory(ingredient_name: str, inventory: int) -> None:
+    """Record a new inventory level written to the database by this process."""
+    global _ingredients_json
+    if _rows is not None and ingredient_name in _rows:
+        _rows[ingredient_name]["inventory"] = inventory
+        _ingredients_json = None
+
+
+def invalidate() -> None:
+    """Drop the snapshot so the next read reloads it from the database."""
+    global _rows, _ingredients_json
+    _rows = None
+    _ingredients_json = None
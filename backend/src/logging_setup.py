@@ -0,0 +1,42 @@
+"""Non-blocking logging for the application.
+
+Records from the ``src`` loggers are put on a queue and written to stdout by a
+background listener thread, so request handlers never block on console I/O.
+"""
+
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+import src.settings as settings
+
+_listener: QueueListener | None = None
+
+
+def setup_logging() -> None:
+    """Attach the queue handler to the ``src`` logger and start the listener."""
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(
+        logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    )
+    _listener = QueueListener(log_queue, stream_handler)
+    _listener.start()
+
+    logger = logging.getLogger("src")
+    logger.addHandler(QueueHandler(log_queue))
+    logger.setLevel(settings.LOG_LEVEL)
+    logger.propagate = False
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
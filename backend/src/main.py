@@ -1,10 +1,15 @@
 import asyncio
 from src.mcp.server import start_mcp
 
+try:
+    import uvloop
+except ImportError:  # uvloop is not available on Windows
+    uvloop = None
+
 
 async def main():
     await start_mcp()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    asyncio.run(main(), loop_factory=uvloop.new_event_loop if uvloop else None)
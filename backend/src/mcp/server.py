@@ -1,102 +1,142 @@
-import aiosqlite
+import asyncio
 
 from fastmcp import FastMCP
+from src.database import inventory_cache
+from src.database.connection import close_db, get_db
 from src.database.load_database import init_db
-from src.settings import DB_FILE
 
 mcp = FastMCP("inventory_db")
 
 
 @mcp.tool()
 async def list_ingredients():
-    async with aiosqlite.connect(DB_FILE) as db:
-        cursor = await db.execute("SELECT ingredient FROM inventory")
-        rows = await cursor.fetchall()
-        return [row[0] for row in rows]
+    return list(await inventory_cache.get_inventory())
 
 
 @mcp.tool()
 async def get_ingredient(ingredient_name: str):
-    async with aiosqlite.connect(DB_FILE) as db:
-        cursor = await db.execute(
-            "SELECT * FROM inventory WHERE ingredient = ?", (ingredient_name,)
-        )
-        row = await cursor.fetchone()
-        if row:
-            columns = [column[0] for column in cursor.description]
-            return dict(zip(columns, row))
-        return None
+    row = await inventory_cache.get_ingredient_row(ingredient_name)
+    if row:
+        return dict(row)
+    return None
 
 
 @mcp.tool()
 async def get_ingredient_info(ingredient_name: str):
-    async with aiosqlite.connect(DB_FILE) as db:
-        cursor = await db.execute(
-            "SELECT * FROM inventory WHERE ingredient = ?", (ingredient_name,)
-        )
-        row = await cursor.fetchone()
-        if row:
-            return row[0]
-        return None
+    row = await inventory_cache.get_ingredient_row(ingredient_name)
+    if row:
+        return row["ingredient"]
+    return None
 
 
 @mcp.tool()
 async def get_icecream_flavours():
-    async with aiosqlite.connect(DB_FILE) as db:
-        cursor = await db.execute("SELECT used_on FROM inventory WHERE used_on != '[]'")
-        rows = await cursor.fetchall()
-        flavours = [row[0][1:-1].split(", ") for row in rows]
-        unique_flavours = set(
-            flavour.strip('"') for sublist in flavours for flavour in sublist
-        )
-        return list(unique_flavours)
+    return list(await inventory_cache.get_flavours())
 
 
 @mcp.tool()
 async def decrease_inventory(ingredient_name: str, amount: int):
-    async with aiosqlite.connect(DB_FILE) as db:
-        await db.execute(
-            "UPDATE inventory SET inventory = inventory - ? WHERE ingredient = ? AND inventory >= ?",
-            (amount, ingredient_name, amount),
-        )
-        await db.commit()
+    db = await get_db()
+    cursor = await db.execute(
+        "UPDATE inventory SET inventory = inventory - ? WHERE ingredient = ? AND inventory >= ? RETURNING inventory",
+        (amount, ingredient_name, amount),
+    )
+    row = await cursor.fetchone()
+    await db.commit()
+    if row is None:
+        return None
+    inventory_cache.set_inventory(ingredient_name, row[0])
+    return {"remaining": row[0]}
+
+
+# Columns that may be requested through get_ingredients_bulk
+INVENTORY_FIELDS = frozenset(
+    {
+        "description",
+        "used_on",
+        "allergies",
+        "quantity",
+        "cost_min",
+        "cost_max",
+        "inventory",
+    }
+)
+
+
+async def _fetch_ingredient_fields(
+    ingredient_names: list[str], fields: list[str]
+) -> dict[str, dict]:
+    """Fetch the given columns for several ingredients in a single query."""
+    unknown = set(fields) - INVENTORY_FIELDS
+    if unknown:
+        raise ValueError(f"Unknown inventory fields: {', '.join(sorted(unknown))}")
+    if not ingredient_names or not fields:
+        return {}
+
+    db = await get_db()
+    placeholders = ", ".join("?" * len(ingredient_names))
+    cursor = await db.execute(
+        f"SELECT ingredient, {', '.join(fields)} FROM inventory "
+        f"WHERE ingredient IN ({placeholders})",
+        ingredient_names,
+    )
+    rows = await cursor.fetchall()
+    return {row[0]: dict(zip(fields, row[1:])) for row in rows}
+
+
+@mcp.tool()
+async def get_ingredients_bulk(ingredient_names: list[str], fields: list[str]):
+    return await _fetch_ingredient_fields(ingredient_names, fields)
 
 
 @mcp.tool()
 async def get_ingredient_cost(ingredient_name: str):
-    async with aiosqlite.connect(DB_FILE) as db:
-        cursor = await db.execute(
-            "SELECT cost_min, cost_max FROM inventory WHERE ingredient = ?",
-            (ingredient_name,),
-        )
-        row = await cursor.fetchone()
-        if row:
-            return {"cost_min": row[0], "cost_max": row[1]}
-        return None
+    rows = await _fetch_ingredient_fields([ingredient_name], ["cost_min", "cost_max"])
+    return rows.get(ingredient_name)
 
 
 @mcp.tool()
 async def get_ingredient_description(ingredient_name: str):
-    async with aiosqlite.connect(DB_FILE) as db:
-        cursor = await db.execute(
-            "SELECT description FROM inventory WHERE ingredient = ?", (ingredient_name,)
-        )
-        row = await cursor.fetchone()
-        if row:
-            return row[0]
-        return None
+    rows = await _fetch_ingredient_fields([ingredient_name], ["description"])
+    row = rows.get(ingredient_name)
+    if row:
+        return row["description"]
+    return None
 
 
 @mcp.tool()
 async def get_ingredient_allergies(ingredient_name: str):
-    async with aiosqlite.connect(DB_FILE) as db:
-        cursor = await db.execute(
-            "SELECT allergies FROM inventory WHERE ingredient = ?", (ingredient_name,)
-        )
-        row = await cursor.fetchone()
-        if row:
-            return row[0]
-        return None
+    rows = await _fetch_ingredient_fields([ingredient_name], ["allergies"])
+    row = rows.get(ingredient_name)
+    if row:
+        return row["allergies"]
+    return None
+
+
+# Mock data for the ReAct demonstration client, built once at import
+MOCK_SELECTION_INGREDIENTS = {
+    "Rich": ("dark_chocolate", "mascarpone", "caramel_sauce"),
+    "Crunchy": ("chocolate_chips", "crushed_nuts", "cookie_crumbles"),
+    "Sweet": ("vanilla_ice_cream", "strawberry_sauce", "whipped_cream"),
+    "Fruity": ("strawberry_ice_cream", "blueberries", "raspberry_sauce"),
+}
+MOCK_DEFAULT_INGREDIENTS = ("vanilla_ice_cream",)
+
+MOCK_INGREDIENT_COSTS = {
+    "dark_chocolate": 0.50,
+    "mascarpone": 0.48,
+    "caramel_sauce": 0.35,
+    "chocolate_chips": 0.25,
+    "crushed_nuts": 0.40,
+    "cookie_crumbles": 0.30,
+    "vanilla_ice_cream": 0.20,
+    "strawberry_sauce": 0.15,
+    "whipped_cream": 0.18,
+    "strawberry_ice_cream": 0.22,
+    "blueberries": 0.60,
+    "raspberry_sauce": 0.25,
+}
+MOCK_DEFAULT_INGREDIENT_COST = 0.10
 
 
 class MCPServerClient:
@@ -104,41 +144,19 @@ class MCPServerClient:
 
     async def map_selection_to_ingredients(self, selection: str) -> list[str]:
         """Map abstract selection to concrete ingredients."""
-        # Mock implementation for ReAct demonstration
-        ingredient_map = {
-            "Rich": ["dark_chocolate", "mascarpone", "caramel_sauce"],
-            "Crunchy": ["chocolate_chips", "crushed_nuts", "cookie_crumbles"],
-            "Sweet": ["vanilla_ice_cream", "strawberry_sauce", "whipped_cream"],
-            "Fruity": ["strawberry_ice_cream", "blueberries", "raspberry_sauce"],
-        }
-        return ingredient_map.get(selection, ["vanilla_ice_cream"])
+        return list(MOCK_SELECTION_INGREDIENTS.get(selection, MOCK_DEFAULT_INGREDIENTS))
 
     async def get_ingredient_cost(self, ingredient: str) -> float:
         """Get cost for a specific ingredient."""
-        # Mock costs for ReAct demonstration
-        costs = {
-            "dark_chocolate": 0.50,
-            "mascarpone": 0.48,
-            "caramel_sauce": 0.35,
-            "chocolate_chips": 0.25,
-            "crushed_nuts": 0.40,
-            "cookie_crumbles": 0.30,
-            "vanilla_ice_cream": 0.20,
-            "strawberry_sauce": 0.15,
-            "whipped_cream": 0.18,
-            "strawberry_ice_cream": 0.22,
-            "blueberries": 0.60,
-            "raspberry_sauce": 0.25,
-        }
-        return costs.get(ingredient, 0.10)
+        return MOCK_INGREDIENT_COSTS.get(ingredient, MOCK_DEFAULT_INGREDIENT_COST)
 
     async def get_cost_for_abstract_selection(self, selection: str) -> dict[str, float]:
         """Get costs for all ingredients in an abstract selection."""
         ingredients = await self.map_selection_to_ingredients(selection)
-        costs = {}
-        for ingredient in ingredients:
-            costs[ingredient] = await self.get_ingredient_cost(ingredient)
-        return costs
+        costs = await asyncio.gather(
+            *(self.get_ingredient_cost(ingredient) for ingredient in ingredients)
+        )
+        return dict(zip(ingredients, costs))
 
     async def generate_ice_cream_image(self, prompt: str) -> str:
         """Generate image for ice cream (mock implementation)."""
@@ -148,8 +166,12 @@ class MCPServerClient:
 
 async def start_mcp():
     await init_db()
-    await mcp.run_http_async(
-        transport="streamable-http",
-        host="127.0.0.1",
-        port=8001,
-    )
+    await get_db()
+    try:
+        await mcp.run_http_async(
+            transport="streamable-http",
+            host="127.0.0.1",
+            port=8001,
+        )
+    finally:
+        await close_db()
@@ -1,6 +1,52 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, FrozenSet, List
 
-from pydantic import BaseModel, Field
+import orjson
+from pydantic import BaseModel, Field, PrivateAttr
+
+
+_COLOR_PALETTE = ("#F7F3E9", "#C57A40", "#3A2B1A")
+
+_NEGATIVE_PROMPT = (
+    "hands",
+    "text",
+    "logos",
+    "watermarks",
+    "multiple_cones",
+    "deformed_ice_cream",
+    "plastic_or_cartoon_style",
+)
+
+# Settings shared by every image request, built once at import and reused by
+# each dump, so treat it as read-only (sequences are tuples for that reason)
+_STATIC_TEMPLATE: Dict[str, Any] = {
+    "look": {
+        "style": "photorealistic",
+        "lighting": "soft_diffused_front",
+        "surface_detail": "high",
+        "color_palette": _COLOR_PALETTE,
+    },
+    "composition": {
+        "framing": "centered",
+        "shot": "close_up",
+        "angle": "eye_level",
+        "negative_space": "ample",
+    },
+    "camera": {"focal_length_mm": 50, "aperture_f": 2.8},
+    "background": {"type": "solid_color", "color": "#F5F7FB"},
+    "output": {
+        "aspect_ratio": "1:1",
+        "width": 512,
+        "height": 512,
+        "format": "png",
+        "seed": 42,
+    },
+    "negative_prompt": _NEGATIVE_PROMPT,
+    "constraints": {"brand_safe": True, "no_background_clutter": True},
+}
+
+# Pre-encoded JSON around the per-instance subject block, for to_json
+_JSON_HEAD = b'{"version":"1.0","task":"generate_image","subject":'
+_STATIC_JSON_TAIL = b"," + orjson.dumps(_STATIC_TEMPLATE)[1:]
 
 
 class ImageInstructions(BaseModel):
@@ -8,47 +54,38 @@ class ImageInstructions(BaseModel):
     flavors: List[str] = Field(default_factory=list)
     toppings: List[str] = Field(default_factory=list)
 
+    # Set views of the lists above for constant-time membership checks
+    _flavor_set: FrozenSet[str] = PrivateAttr(default=frozenset())
+    _topping_set: FrozenSet[str] = PrivateAttr(default=frozenset())
+
+    def model_post_init(self, __context: Any) -> None:
+        self._flavor_set = frozenset(self.flavors)
+        self._topping_set = frozenset(self.toppings)
+
+    def contains_flavor(self, name: str) -> bool:
+        return name in self._flavor_set
+
+    def contains_topping(self, name: str) -> bool:
+        return name in self._topping_set
+
+    def _subject(self) -> Dict[str, Any]:
+        return {
+            "type": "ice_cream_cone",
+            "scoops": self.scoops,
+            "flavors": self.flavors,
+            "container": "waffle_cone",
+            "toppings": self.toppings,
+            "state": "slightly_melting",
+        }
+
     def model_dump(self, **kwargs) -> Dict[str, Any]:
         return {
             "version": "1.0",
             "task": "generate_image",
-            "subject": {
-                "type": "ice_cream_cone",
-                "scoops": self.scoops,
-                "flavors": self.flavors,
-                "container": "waffle_cone",
-                "toppings": self.toppings,
-                "state": "slightly_melting",
-            },
-            "look": {
-                "style": "photorealistic",
-                "lighting": "soft_diffused_front",
-                "surface_detail": "high",
-                "color_palette": ["#F7F3E9", "#C57A40", "#3A2B1A"],
-            },
-            "composition": {
-                "framing": "centered",
-                "shot": "close_up",
-                "angle": "eye_level",
-                "negative_space": "ample",
-            },
-            "camera": {"focal_length_mm": 50, "aperture_f": 2.8},
-            "background": {"type": "solid_color", "color": "#F5F7FB"},
-            "output": {
-                "aspect_ratio": "1:1",
-                "width": 512,
-                "height": 512,
-                "format": "png",
-                "seed": 42,
-            },
-            "negative_prompt": [
-                "hands",
-                "text",
-                "logos",
-                "watermarks",
-                "multiple_cones",
-                "deformed_ice_cream",
-                "plastic_or_cartoon_style",
-            ],
-            "constraints": {"brand_safe": True, "no_background_clutter": True},
+            "subject": self._subject(),
+            **_STATIC_TEMPLATE,
         }
+
+    def to_json(self) -> bytes:
+        """Encode model_dump() as JSON, reusing the pre-encoded static template."""
+        return _JSON_HEAD + orjson.dumps(self._subject()) + _STATIC_JSON_TAIL
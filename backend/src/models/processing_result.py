@@ -1,7 +1,7 @@
 """Processing result models with game context and validation."""
 
 from typing import Dict, List, Any, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
 from src.models.image_instructions import ImageInstructions
 from src.models.reasoning_step import ReasoningStep
 
@@ -9,6 +9,9 @@ from src.models.reasoning_step import ReasoningStep
 class CostValidation(BaseModel):
     """Comparison between ignored frontend cost vs authoritative backend calculation."""
 
+    # Build validators on first use rather than at import
+    model_config = ConfigDict(defer_build=True)
+
     frontend_cost: (
         float  # Value from frontend (for reference only, IGNORED in processing)
     )
@@ -18,6 +21,8 @@ class CostValidation(BaseModel):
     calculation_method: str = "ingredient_database"  # Always from backend database
     details: Optional[str] = None
 
+    # Derived from the fields on each access, so model_copy(update=...) and
+    # assignment never leave them stale; both are a few float operations
     @property
     def has_discrepancy(self) -> bool:
         """Check if there's a difference between frontend and backend (for analysis only)."""
@@ -34,6 +39,8 @@ class CostValidation(BaseModel):
 class ProcessingResult(BaseModel):
     """Complete result with structured data and authoritative backend-calculated cost."""
 
+    model_config = ConfigDict(defer_build=True)
+
     player_id: str
     player_name: str
     image_instructions: ImageInstructions
@@ -65,41 +72,50 @@ class ProcessingResult(BaseModel):
 
     def get_debug_report(self) -> str:
         """Generate a comprehensive debug report."""
-        report = f"Processing Report for Player {self.player_name} ({self.player_id})\n"
-        report += "=" * 60 + "\n\n"
-
-        report += f"Final Cost: ${self.total_cost:.2f}\n"
-        report += f"Cost Validation: {self.cost_validation.validation_status}\n"
-        if self.cost_validation.has_discrepancy:
-            report += f"Cost Discrepancy: ${self.cost_validation.difference:.2f} ({self.cost_validation.discrepancy_percentage:.1f}%)\n"
+        cost_validation = self.cost_validation
+        parts = [
+            f"Processing Report for Player {self.player_name} ({self.player_id})\n",
+            "=" * 60 + "\n\n",
+            f"Final Cost: ${self.total_cost:.2f}\n",
+            f"Cost Validation: {cost_validation.validation_status}\n",
+        ]
+        if cost_validation.has_discrepancy:
+            parts.append(
+                f"Cost Discrepancy: ${cost_validation.difference:.2f} ({cost_validation.discrepancy_percentage:.1f}%)\n"
+            )
 
-        report += f"\nSelected Ingredients: {', '.join(self.selected_ingredients)}\n"
+        parts.append(
+            f"\nSelected Ingredients: {', '.join(self.selected_ingredients)}\n"
+        )
         if self.allergy_warnings:
-            report += f"Allergy Warnings: {', '.join(self.allergy_warnings)}\n"
+            parts.append(f"Allergy Warnings: {', '.join(self.allergy_warnings)}\n")
 
         if self.personality_influence:
-            report += "\nPersonality Influence:\n"
-            for key, value in self.personality_influence.items():
-                report += f"  {key}: {value}\n"
+            parts.append("\nPersonality Influence:\n")
+            parts.extend(
+                f"  {key}: {value}\n"
+                for key, value in self.personality_influence.items()
+            )
 
         if self.processing_errors:
-            report += "\nProcessing Errors:\n"
-            for error in self.processing_errors:
-                report += f"  - {error}\n"
+            parts.append("\nProcessing Errors:\n")
+            parts.extend(f"  - {error}\n" for error in self.processing_errors)
 
-        report += f"\nProcessing Time: {self.processing_time:.2f} seconds\n"
-        report += f"\nReasoning Steps ({len(self.reasoning_steps)}):\n"
-        report += "-" * 40 + "\n"
+        parts.append(f"\nProcessing Time: {self.processing_time:.2f} seconds\n")
+        parts.append(f"\nReasoning Steps ({len(self.reasoning_steps)}):\n")
+        parts.append("-" * 40 + "\n")
 
         for step in self.reasoning_steps:
-            report += step.to_debug_string() + "\n"
+            parts.extend((step.to_debug_string(), "\n"))
 
-        return report
+        return "".join(parts)
 
 
 class GameProcessingResult(BaseModel):
     """Result for processing an entire game with multiple players."""
 
+    model_config = ConfigDict(defer_build=True)
+
     game_date: str
     total_players: int
     player_results: List[ProcessingResult] = Field(default_factory=list)
@@ -107,34 +123,48 @@ class GameProcessingResult(BaseModel):
     processing_errors: List[str] = Field(default_factory=list)
     total_processing_time: float = 0.0
 
+    # Running aggregates for get_cost_summary, kept in step with player_results
+    _sum_frontend: float = PrivateAttr(default=0.0)
+    _sum_calculated: float = PrivateAttr(default=0.0)
+    _sum_processing_time: float = PrivateAttr(default=0.0)
+    _discrepancy_count: int = PrivateAttr(default=0)
+    _max_discrepancy: Optional[float] = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: Any) -> None:
+        for result in self.player_results:
+            self._accumulate(result)
+
+    def _accumulate(self, result: ProcessingResult) -> None:
+        """Fold one player result into the running cost aggregates."""
+        cost_validation = result.cost_validation
+        self._sum_frontend += cost_validation.frontend_cost
+        self._sum_calculated += cost_validation.calculated_cost
+        self._sum_processing_time += result.processing_time
+        if cost_validation.has_discrepancy:
+            self._discrepancy_count += 1
+            if (
+                self._max_discrepancy is None
+                or cost_validation.difference > self._max_discrepancy
+            ):
+                self._max_discrepancy = cost_validation.difference
+
     def add_player_result(self, result: ProcessingResult) -> None:
         """Add a player result to the game processing result."""
         self.player_results.append(result)
+        self._accumulate(result)
 
     def get_cost_summary(self) -> Dict[str, Any]:
         """Get cost validation summary for all players."""
-        total_frontend_cost = sum(
-            r.cost_validation.frontend_cost for r in self.player_results
-        )
-        total_calculated_cost = sum(
-            r.cost_validation.calculated_cost for r in self.player_results
-        )
-        discrepancies = [
-            r for r in self.player_results if r.cost_validation.has_discrepancy
-        ]
-
+        player_count = len(self.player_results)
         return {
-            "total_frontend_cost": total_frontend_cost,
-            "total_calculated_cost": total_calculated_cost,
-            "total_difference": total_calculated_cost - total_frontend_cost,
-            "players_with_discrepancies": len(discrepancies),
-            "largest_discrepancy": max(
-                (r.cost_validation.difference for r in discrepancies), default=0.0
+            "total_frontend_cost": self._sum_frontend,
+            "total_calculated_cost": self._sum_calculated,
+            "total_difference": self._sum_calculated - self._sum_frontend,
+            "players_with_discrepancies": self._discrepancy_count,
+            "largest_discrepancy": (
+                self._max_discrepancy if self._max_discrepancy is not None else 0.0
             ),
-            "average_processing_time": sum(
-                r.processing_time for r in self.player_results
-            )
-            / len(self.player_results)
-            if self.player_results
+            "average_processing_time": self._sum_processing_time / player_count
+            if player_count
             else 0.0,
         }
@@ -21,13 +21,17 @@ class ReasoningStep(BaseModel):
 
     def to_debug_string(self) -> str:
         """Generate human-readable debug string."""
-        debug_str = f"Step {self.step_number}: {self.action}\n"
-        debug_str += f"Timestamp: {self.timestamp}\n"
-        debug_str += f"Reasoning: {self.reasoning}\n"
-        if self.game_context:
-            debug_str += f"Game Context: {self.game_context}\n"
-        if self.tool_calls:
-            debug_str += f"Tool Calls: {', '.join(self.tool_calls)}\n"
-        debug_str += f"Input: {self.input_data}\n"
-        debug_str += f"Output: {self.output_data}\n"
-        return debug_str
+        game_context = (
+            f"Game Context: {self.game_context}\n" if self.game_context else ""
+        )
+        tool_calls = (
+            f"Tool Calls: {', '.join(self.tool_calls)}\n" if self.tool_calls else ""
+        )
+        return (
+            f"Step {self.step_number}: {self.action}\n"
+            f"Timestamp: {self.timestamp.isoformat()}\n"
+            f"Reasoning: {self.reasoning}\n"
+            f"{game_context}{tool_calls}"
+            f"Input: {self.input_data}\n"
+            f"Output: {self.output_data}\n"
+        )
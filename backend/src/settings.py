@@ -24,9 +24,23 @@ STABILITY_AI_KEY = os.getenv("STABILITY_AI_KEY")
 SERVER_HOST = os.getenv("SERVER_HOST", "localhost")
 SERVER_PORT = os.getenv("SERVER_PORT", "8000")
 SERVER_URL = f"http://{SERVER_HOST}:{SERVER_PORT}"
+# Game sessions and the inventory snapshot live in process memory, so more
+# than one worker only suits deployments that don't rely on sessions
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "1"))
+
+# Concurrent Stability AI requests per process; match the account's quota
+STABILITY_CONCURRENCY = int(os.getenv("STABILITY_CONCURRENCY", "4"))
+
+# Origins allowed to call the API (compiled once by the CORS middleware)
+CORS_ORIGIN_REGEX = os.getenv(
+    "CORS_ORIGIN_REGEX", r"^https?://(localhost|127\.0\.0\.1)(:\d+)?$"
+)
 
 # Database configuration
 DB_FILE = os.getenv("DB_FILE", SRC_DIR / "database" / "ingredients.db")
 
 # Debug flag for development
 DEBUG = os.getenv("DEBUG", "false").lower() == "true"
+
+# Logging level for the application's own loggers
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG" if DEBUG else "INFO").upper()
@@ -1,12 +1,27 @@
 """Session-based memory storage for maintaining game state between requests."""
 
 import asyncio
+import heapq
+import logging
+import sys
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 import uuid
-import sys
+
+import orjson
 from .session_models import GameSessionData, PlayerSessionData, SessionMemoryStats
 
+logger = logging.getLogger(__name__)
+
+# Stale expiry heap entries tolerated beyond the live count before a rebuild
+EXPIRY_HEAP_SLACK = 64
+
+
+def _name_key(player_name: str) -> str:
+    """Interned lowercase player name, so index probes can match by identity."""
+    return sys.intern(player_name.lower())
+
 
 class SessionMemory:
     """In-memory session storage with automatic cleanup and expiration."""
@@ -14,42 +29,33 @@ class SessionMemory:
     def __init__(self, session_timeout_hours: int = 24):
         """Initialize session memory with configurable timeout."""
         self._sessions: Dict[str, GameSessionData] = {}
+        # Monotonic expiry per session; internal expiry checks use these floats
+        # while GameSessionData.expires_at stays the API-facing datetime
+        self._expiry_ts: Dict[str, float] = {}
+        # The expires_at each monotonic expiry was derived from, so updates
+        # that leave expires_at unchanged keep their expiry and timer
+        self._expires_at: Dict[str, datetime] = {}
+        # session_id -> lowercased player name -> player, for O(1) lookups
+        self._player_index: Dict[str, Dict[str, PlayerSessionData]] = {}
+        # Serialized size per session, measured on create/replace, and the total
+        self._session_sizes: Dict[str, int] = {}
+        self._bytes_estimate = 0
+        # (expiry_ts, session_id) min-heap for cleanup sweeps. Entries for
+        # removed or rescheduled sessions are skipped when popped, and the
+        # heap is rebuilt from _expiry_ts once they outnumber live entries
+        self._expiry_heap: List[Tuple[float, str]] = []
+        # One loop timer per session that removes it when it expires
+        self._expiry_timers: Dict[str, asyncio.TimerHandle] = {}
         self._session_timeout = timedelta(hours=session_timeout_hours)
-        self._cleanup_task = None
-        self._start_cleanup_task()
-
-    def _start_cleanup_task(self):
-        """Start background task for cleaning up expired sessions."""
-
-        async def cleanup_loop():
-            while True:
-                await asyncio.sleep(3600)  # Run cleanup every hour
-                await self.cleanup_expired_sessions()
-
-        # Start the cleanup task
-        try:
-            loop = asyncio.get_event_loop()
-            self._cleanup_task = loop.create_task(cleanup_loop())
-        except RuntimeError:
-            # No event loop running yet, cleanup will be handled manually
-            pass
 
     def create_session(self, players: List[Dict[str, Any]]) -> str:
         """Create a new game session with players."""
         session_id = str(uuid.uuid4())
         now = datetime.now()
 
-        # Convert player data to PlayerSessionData
-        session_players = []
-        for player_data in players:
-            player = PlayerSessionData(
-                id=player_data.get("id", str(uuid.uuid4())),
-                name=player_data.get("name", "Unknown"),
-                selections=player_data.get("selections", []),
-                ai_interactions=player_data.get("aiInteractions", []),
-                total_cost=player_data.get("totalCost", 0.0),
-            )
-            session_players.append(player)
+        session_players = [
+            PlayerSessionData.from_frontend(player_data) for player_data in players
+        ]
 
         # Create session
         session = GameSessionData(
@@ -61,25 +67,113 @@ class SessionMemory:
         )
 
         self._sessions[session_id] = session
-        print(f"✅ Created session {session_id} with {len(session_players)} players")
+        self._expires_at[session_id] = session.expires_at
+        self._set_expiry(
+            session_id, time.monotonic() + self._session_timeout.total_seconds()
+        )
+        self._player_index[session_id] = self._index_players(session_players)
+        self._set_size(session_id, len(orjson.dumps(session)))
+        logger.debug(
+            "Created session %s with %d players", session_id, len(session_players)
+        )
         return session_id
 
     def get_session(self, session_id: str) -> Optional[GameSessionData]:
         """Get session data by ID."""
-        session = self._sessions.get(session_id)
-        if session and session.expires_at > datetime.now():
-            return session
-        elif session:
-            # Session expired, remove it
-            del self._sessions[session_id]
-            print(f"🗑️ Removed expired session {session_id}")
+        expiry_ts = self._expiry_ts.get(session_id)
+        if expiry_ts is None:
+            return None
+        if expiry_ts > time.monotonic():
+            return self._sessions[session_id]
+
+        # Session expired, remove it
+        self._remove_session(session_id)
+        logger.debug("Removed expired session %s", session_id)
         return None
 
+    def _remove_session(self, session_id: str) -> None:
+        """Drop a session and its expiry and player index entries."""
+        del self._sessions[session_id]
+        del self._expiry_ts[session_id]
+        del self._expires_at[session_id]
+        del self._player_index[session_id]
+        self._bytes_estimate -= self._session_sizes.pop(session_id, 0)
+        timer = self._expiry_timers.pop(session_id, None)
+        if timer is not None:
+            timer.cancel()
+
+    def _set_size(self, session_id: str, size: int) -> None:
+        """Record a session's serialized size in the running byte estimate."""
+        self._bytes_estimate += size - self._session_sizes.get(session_id, 0)
+        self._session_sizes[session_id] = size
+
+    def _set_expiry(self, session_id: str, expiry_ts: float) -> None:
+        """Record a session's monotonic expiry and schedule its removal.
+
+        Outside a running event loop no timer is scheduled; expired sessions
+        are then dropped lazily by get_session or cleanup_expired_sessions.
+        """
+        if self._expiry_ts.get(session_id) == expiry_ts:
+            return
+        self._expiry_ts[session_id] = expiry_ts
+        heapq.heappush(self._expiry_heap, (expiry_ts, session_id))
+        if len(self._expiry_heap) > 2 * len(self._expiry_ts) + EXPIRY_HEAP_SLACK:
+            self._expiry_heap = [(ts, sid) for sid, ts in self._expiry_ts.items()]
+            heapq.heapify(self._expiry_heap)
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        timer = self._expiry_timers.pop(session_id, None)
+        if timer is not None:
+            timer.cancel()
+        self._expiry_timers[session_id] = loop.call_later(
+            max(0.0, expiry_ts - time.monotonic()),
+            self._expire_one,
+            session_id,
+            expiry_ts,
+        )
+
+    def _expire_one(self, session_id: str, expiry_ts: float) -> None:
+        """Timer callback: remove a session if its expiry is still expiry_ts."""
+        if self._expiry_ts.get(session_id) == expiry_ts:
+            self._expiry_timers.pop(session_id, None)
+            self._remove_session(session_id)
+            logger.debug("Removed expired session %s", session_id)
+
+    @staticmethod
+    def _index_players(
+        players: List[PlayerSessionData],
+    ) -> Dict[str, PlayerSessionData]:
+        """Map lowercased player names to players, first match winning."""
+        index: Dict[str, PlayerSessionData] = {}
+        for player in players:
+            index.setdefault(_name_key(player.name), player)
+        return index
+
     def update_session(self, session_id: str, session_data: GameSessionData) -> bool:
-        """Update existing session data."""
-        if session_id in self._sessions:
-            session_data.updated_at = datetime.now()
-            self._sessions[session_id] = session_data
+        """Update existing session data.
+
+        Sessions returned by get_session are the stored objects, so callers may
+        mutate them in place and pass the same object back here.
+        """
+        stored = self._sessions.get(session_id)
+        if stored is not None:
+            now = datetime.now()
+            session_data.touch(now)
+            if stored is not session_data:
+                self._sessions[session_id] = session_data
+            if session_data.expires_at != self._expires_at[session_id]:
+                # expires_at may have been assigned directly; resync its ISO copy
+                session_data.set_expiry(session_data.expires_at)
+                self._expires_at[session_id] = session_data.expires_at
+                self._set_expiry(
+                    session_id,
+                    time.monotonic() + (session_data.expires_at - now).total_seconds(),
+                )
+            self._player_index[session_id] = self._index_players(session_data.players)
+            self._set_size(session_id, len(orjson.dumps(session_data)))
             return True
         return False
 
@@ -87,12 +181,9 @@ class SessionMemory:
         self, session_id: str, player_name: str
     ) -> Optional[PlayerSessionData]:
         """Get specific player data from session."""
-        session = self.get_session(session_id)
-        if session:
-            for player in session.players:
-                if player.name.lower() == player_name.lower():
-                    return player
-        return None
+        if self.get_session(session_id) is None:
+            return None
+        return self._player_index[session_id].get(_name_key(player_name))
 
     def update_player_in_session(
         self, session_id: str, player_name: str, updates: Dict[str, Any]
@@ -102,21 +193,20 @@ class SessionMemory:
         if not session:
             return False
 
-        # Find and update player
-        for i, player in enumerate(session.players):
-            if player.name.lower() == player_name.lower():
-                # Update player data
-                for key, value in updates.items():
-                    if hasattr(player, key):
-                        setattr(player, key, value)
+        player = self._player_index[session_id].get(_name_key(player_name))
+        if player is None:
+            return False
 
-                # Update session
-                session.updated_at = datetime.now()
-                self._sessions[session_id] = session
-                print(f"✅ Updated player {player_name} in session {session_id}")
-                return True
+        # Player is mutated in place, so the session needs no reassignment
+        for key, value in updates.items():
+            if hasattr(player, key):
+                setattr(player, key, value)
+        if "name" in updates:
+            self._player_index[session_id] = self._index_players(session.players)
 
-        return False
+        session.touch(datetime.now())
+        logger.debug("Updated player %s in session %s", player_name, session_id)
+        return True
 
     def store_processing_result(
         self, session_id: str, player_name: str, processing_result: Dict[str, Any]
@@ -139,45 +229,51 @@ class SessionMemory:
         session = self.get_session(session_id)
         if session:
             session.status = "completed"
-            session.updated_at = datetime.now()
-            self._sessions[session_id] = session
+            session.touch(datetime.now())
             return True
         return False
 
     def delete_session(self, session_id: str) -> bool:
         """Delete a session."""
         if session_id in self._sessions:
-            del self._sessions[session_id]
-            print(f"🗑️ Deleted session {session_id}")
+            self._remove_session(session_id)
+            logger.debug("Deleted session %s", session_id)
             return True
         return False
 
     async def cleanup_expired_sessions(self) -> int:
-        """Clean up expired sessions and return count of removed sessions."""
-        now = datetime.now()
-        expired_sessions = [
-            session_id
-            for session_id, session in self._sessions.items()
-            if session.expires_at <= now
-        ]
-
-        for session_id in expired_sessions:
-            del self._sessions[session_id]
-
-        if expired_sessions:
-            print(f"🧹 Cleaned up {len(expired_sessions)} expired sessions")
-
-        return len(expired_sessions)
+        """Clean up expired sessions and return count of removed sessions.
+
+        Loop timers normally remove sessions as they expire; this sweep only
+        catches sessions whose expiry was set outside a running event loop.
+        It pops due entries off the expiry heap, so its cost tracks the
+        number of expired entries rather than the number of sessions.
+        """
+        now_ts = time.monotonic()
+        heap = self._expiry_heap
+        removed = 0
+        while heap and heap[0][0] <= now_ts:
+            expiry_ts, session_id = heapq.heappop(heap)
+            # Stale entry: the session was removed or given a new expiry
+            if self._expiry_ts.get(session_id) != expiry_ts:
+                continue
+            self._remove_session(session_id)
+            removed += 1
+
+        if removed:
+            logger.debug("Cleaned up %d expired sessions", removed)
+
+        return removed
 
     def get_stats(self) -> SessionMemoryStats:
         """Get memory usage statistics."""
-        now = datetime.now()
-        active_sessions = sum(1 for s in self._sessions.values() if s.expires_at > now)
+        now_ts = time.monotonic()
+        active_sessions = sum(1 for ts in self._expiry_ts.values() if ts > now_ts)
         expired_sessions = len(self._sessions) - active_sessions
         total_players = sum(len(s.players) for s in self._sessions.values())
 
-        # Rough memory estimation
-        memory_usage_mb = sys.getsizeof(self._sessions) / (1024 * 1024)
+        # Estimated from serialized session sizes, tracked incrementally
+        memory_usage_mb = self._bytes_estimate / (1024 * 1024)
 
         return SessionMemoryStats(
             total_sessions=len(self._sessions),
@@ -189,11 +285,11 @@ class SessionMemory:
 
     def list_sessions(self) -> List[str]:
         """List all active session IDs."""
-        now = datetime.now()
+        now_ts = time.monotonic()
         return [
             session_id
-            for session_id, session in self._sessions.items()
-            if session.expires_at > now
+            for session_id, expiry_ts in self._expiry_ts.items()
+            if expiry_ts > now_ts
         ]
 
 
@@ -1,36 +1,76 @@
-"""Session models for storing game state between requests."""
+"""Session models for storing game state between requests.
 
-from typing import Dict, List, Any, Optional
-from pydantic import BaseModel
+These are plain in-memory containers, so they are slotted dataclasses rather
+than pydantic models: no validation runs when sessions and players are built.
+"""
+
+from dataclasses import dataclass, field
 from datetime import datetime
+from typing import Any, Dict, List, Optional
+import uuid
 
 
-class PlayerSessionData(BaseModel):
+@dataclass(slots=True)
+class PlayerSessionData:
     """Data stored for a single player during a game session."""
 
     id: str
     name: str
     selections: List[str]
-    ai_interactions: List[Dict[str, Any]] = []
+    ai_interactions: List[Dict[str, Any]] = field(default_factory=list)
     total_cost: float = 0.0
     processing_result: Optional[Dict[str, Any]] = None
     generated_image_url: Optional[str] = None
     personality: Optional[Dict[str, Any]] = None
 
+    @classmethod
+    def from_frontend(cls, player_data: Dict[str, Any]) -> "PlayerSessionData":
+        """Build a player from the frontend's camelCase player payload."""
+        return cls(
+            id=player_data["id"] if "id" in player_data else str(uuid.uuid4()),
+            name=player_data.get("name", "Unknown"),
+            selections=player_data.get("selections", []),
+            ai_interactions=player_data.get("aiInteractions", []),
+            total_cost=player_data.get("totalCost", 0.0),
+        )
+
 
-class GameSessionData(BaseModel):
+@dataclass(slots=True)
+class GameSessionData:
     """Complete game session data."""
 
     session_id: str
     created_at: datetime
     updated_at: datetime
     players: List[PlayerSessionData]
-    game_metadata: Dict[str, Any] = {}
-    status: str = "active"  # active, completed, expired
     expires_at: datetime
+    game_metadata: Dict[str, Any] = field(default_factory=dict)
+    status: str = "active"  # active, completed, expired
+
+    # Cached ISO strings so status polling does not reformat datetimes per request
+    created_at_iso: str = field(default="", init=False, repr=False)
+    updated_at_iso: str = field(default="", init=False, repr=False)
+    expires_at_iso: str = field(default="", init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        """Populate the cached ISO strings from the datetime fields."""
+        self.created_at_iso = self.created_at.isoformat()
+        self.updated_at_iso = self.updated_at.isoformat()
+        self.expires_at_iso = self.expires_at.isoformat()
+
+    def touch(self, now: datetime) -> None:
+        """Set the last-updated time and refresh its cached ISO string."""
+        self.updated_at = now
+        self.updated_at_iso = now.isoformat()
+
+    def set_expiry(self, expires_at: datetime) -> None:
+        """Set the expiry time and refresh its cached ISO string."""
+        self.expires_at = expires_at
+        self.expires_at_iso = expires_at.isoformat()
 
 
-class SessionMemoryStats(BaseModel):
+@dataclass(slots=True)
+class SessionMemoryStats:
     """Statistics about session memory usage."""
 
     total_sessions: int
@@ -4,12 +4,263 @@
 from .image_generator_ultra import ImageGeneratorUltraTool
 
 # Keep original for fallback
+import asyncio
+import functools
+import hashlib
+import itertools
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+import weakref
+import aiohttp
+import orjson
 import requests
+from collections import OrderedDict
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from pathlib import Path
-from datetime import datetime
-from typing import Optional, Tuple, Any
+from typing import Any, BinaryIO, Optional, Tuple
 
 import src.settings
+from src.tools.stability_limits import run_in_stability_pool, stability_slots
+
+logger = logging.getLogger(__name__)
+
+# Generated images are saved in the project root (2 levels up from this file)
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+# Content-addressed copies of Core images, keyed by a hash of their prompt,
+# pruned least recently used first once they exceed IMAGE_CACHE_MAX_BYTES.
+# The directory is shared with Ultra, whose entries are named ultra_*
+IMAGE_CACHE_DIR = PROJECT_ROOT / "images" / "cache"
+IMAGE_CACHE_MAX_BYTES = 1024**3
+
+# Cache paths looked up for recent prompts, least recently used first
+IMAGE_PATH_CACHE_LIMIT = 256
+
+# Images generated with save_to_root=False skip the disk: they are kept here,
+# least recently stored first, and served from /api/v1/images/mem/<key>.png
+MEMORY_IMAGE_LIMIT = 64
+_memory_images: "OrderedDict[str, bytes]" = OrderedDict()
+_memory_images_lock = threading.Lock()
+
+# Response bodies are streamed to disk in chunks rather than held in memory
+IMAGE_CHUNK_SIZE = 64 * 1024
+IMAGE_WRITE_BUFFER = 1024 * 1024
+
+# Unique suffixes for output and in-progress image files, so concurrent writers
+# of the same name (pool threads, or sync and async fetches) never share one
+_part_ids = itertools.count()
+
+# Ingredient keywords, matched as substrings in one C-level regex scan each
+FLAVOR_KEYWORDS = (
+    "ice cream",
+    "gelato",
+    "sorbet",
+    "frozen yogurt",
+    "vanilla",
+    "chocolate",
+    "strawberry",
+    "mint",
+    "pistachio",
+    "cookie",
+    "caramel",
+    "butterscotch",
+    "rocky road",
+    "neapolitan",
+    "rainbow",
+    "tutti frutti",
+)
+TOPPING_KEYWORDS = (
+    "sauce",
+    "syrup",
+    "sprinkles",
+    "chips",
+    "chunks",
+    "nuts",
+    "berries",
+    "fruit",
+    "whipped",
+    "fudge",
+    "drizzle",
+    "crumble",
+    "wafer",
+    "cone",
+    "candies",
+    "gummy",
+    "marshmallow",
+    "graham",
+    "oreo",
+    "brownie",
+    "cherry",
+)
+_FLAVOR_RE = re.compile("|".join(map(re.escape, FLAVOR_KEYWORDS)), re.IGNORECASE)
+_TOPPING_RE = re.compile("|".join(map(re.escape, TOPPING_KEYWORDS)), re.IGNORECASE)
+
+# Flavors and toppings named in a Core prompt, each, for clarity
+PROMPT_ITEM_LIMIT = 3
+
+# Fixed style text closing every Core prompt
+PROMPT_SUFFIX = (
+    ". Photorealistic, high-quality image with soft lighting, clean background, "
+    "appetizing presentation, slightly melting texture. Studio lighting with "
+    "soft shadows. Commercial food photography style."
+)
+
+# Seconds Ultra runs alone before a Core request is hedged in; Ultra normally
+# answers well within this, so Core is only billed when Ultra is slow or fails
+ULTRA_HEDGE_DELAY = 20.0
+
+# Shared aiohttp session for the async Core path, created on first use and
+# closed on app shutdown
+_http_session: Optional[aiohttp.ClientSession] = None
+
+
+def _get_http_session() -> aiohttp.ClientSession:
+    """Return the shared aiohttp session, opening it on first use."""
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        _http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=32, limit_per_host=16, ttl_dns_cache=300
+            )
+        )
+    return _http_session
+
+
+async def close_http_session() -> None:
+    """Close the shared aiohttp session, and the Ultra client's, if open."""
+    global _http_session
+    if _http_session is not None:
+        await _http_session.close()
+        _http_session = None
+    if _get_ultra_generator.cache_info().currsize:
+        await _get_ultra_generator().aclose()
+
+
+def _prompt_cache_key(prompt: str) -> str:
+    """Hash a prompt into the image cache key."""
+    return hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+
+
+@functools.lru_cache(maxsize=1024)
+def _natural_language_prompt(ingredients: Tuple[str, ...], scoops: int) -> str:
+    """Build the Core prompt for a normalized (sorted, lowercased) ingredient key."""
+    # Classify ingredients into flavors and toppings
+    flavors = []
+    toppings = []
+
+    # Only the first PROMPT_ITEM_LIMIT of each make it into the prompt, so
+    # classification stops once both lists are full
+    for ingredient in ingredients:
+        # Uncategorized ingredients are assumed to be flavors
+        if _FLAVOR_RE.search(ingredient) or not _TOPPING_RE.search(ingredient):
+            if len(flavors) < PROMPT_ITEM_LIMIT:
+                flavors.append(ingredient)
+        elif len(toppings) < PROMPT_ITEM_LIMIT:
+            toppings.append(ingredient)
+        if len(flavors) == len(toppings) == PROMPT_ITEM_LIMIT:
+            break
+
+    # Build the prompt
+    if scoops == 1:
+        base_text = "A single scoop of ice cream"
+    elif scoops == 2:
+        base_text = "Two scoops of ice cream"
+    else:
+        base_text = f"{scoops} scoops of ice cream"
+
+    # Add flavors
+    if flavors:
+        base_text += f" with {', '.join(flavors)}"
+
+    # Add toppings
+    if toppings:
+        base_text += f" topped with {', '.join(toppings)}"
+
+    # Determine serving style
+    if scoops <= 2:
+        container = "in a waffle cone"
+    else:
+        container = "served in a bowl"
+
+    # Final prompt
+    return f"Professional food photography of {base_text}, {container}{PROMPT_SUFFIX}"
+
+
+def _read_image(image_stream: BinaryIO) -> Tuple[bytes, str]:
+    """Read a response body in chunks, hashing it into its key as it arrives."""
+    digest = hashlib.blake2b(digest_size=16)
+    chunks = []
+    for chunk in iter(lambda: image_stream.read(IMAGE_CHUNK_SIZE), b""):
+        digest.update(chunk)
+        chunks.append(chunk)
+    return b"".join(chunks), digest.hexdigest()
+
+
+def _part_path(target: Path) -> Path:
+    """Unique temporary name a new image is written under before the rename."""
+    return target.with_name(f"{target.name}.{os.getpid()}.{next(_part_ids)}.part")
+
+
+def _prune_image_cache() -> None:
+    """Delete the least recently used cached Core images beyond the size cap."""
+    entries = []
+    for path in IMAGE_CACHE_DIR.glob("*.png"):
+        if path.name.startswith("ultra_"):
+            continue
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = 0
+    for _, size, path in sorted(entries, reverse=True):
+        total += size
+        if total > IMAGE_CACHE_MAX_BYTES:
+            path.unlink(missing_ok=True)
+
+
+def _remember_image(key: str, content: bytes) -> None:
+    """Keep an image in memory under its content key."""
+    with _memory_images_lock:
+        _memory_images[key] = content
+        _memory_images.move_to_end(key)
+        while len(_memory_images) > MEMORY_IMAGE_LIMIT:
+            _memory_images.popitem(last=False)
+
+
+def get_memory_image(key: str) -> Optional[bytes]:
+    """Return an in-memory image by key, unless it has been evicted."""
+    return _memory_images.get(key)
+
+
+def _log_core_failure(error: Exception) -> None:
+    """Log a failed Core generation, with setup hints for auth errors."""
+    logger.error("Stability AI Core image generation failed: %s", error)
+
+    # Check if it's an auth error and provide helpful guidance
+    if "401" in str(error) or "unauthorized" in str(error).lower():
+        logger.error(
+            "Authentication failed. Please ensure STABILITY_AI_KEY environment "
+            "variable is set. Get your API key from: "
+            "https://platform.stability.ai/account/keys"
+        )
+
+
+def _succeeded(task: "asyncio.Task[Tuple[Optional[str], Optional[str], bool]]") -> bool:
+    """Whether a finished generation task produced an image."""
+    return task.exception() is None and task.result()[2]
+
+
+@functools.cache
+def _get_ultra_generator() -> ImageGeneratorUltraTool:
+    """Return the shared Ultra client, so every ImageGeneratorTool reuses it."""
+    return ImageGeneratorUltraTool()
 
 
 class ImageGeneratorTool:
@@ -24,7 +275,7 @@ class ImageGeneratorTool:
 
         # Try Ultra first
         try:
-            self.ultra_generator = ImageGeneratorUltraTool()
+            self.ultra_generator = _get_ultra_generator()
             self.has_ultra = True
         except Exception:
             self.has_ultra = False
@@ -33,6 +284,33 @@ class ImageGeneratorTool:
         self.api_key = src.settings.STABILITY_AI_KEY
         self.base_url = "https://api.stability.ai/v2beta/stable-image/generate/core"
 
+        # Pooled keep-alive session so repeat calls skip the TCP/TLS handshake
+        self._session = requests.Session()
+        self._session.mount(
+            "https://",
+            HTTPAdapter(
+                pool_connections=8,
+                pool_maxsize=16,
+                max_retries=Retry(
+                    total=3,
+                    backoff_factor=0.3,
+                    status_forcelist=[429, 500, 502, 503, 504],
+                    allowed_methods=None,
+                ),
+            ),
+        )
+        self._session.headers.update(
+            {"authorization": f"Bearer {self.api_key}", "accept": "image/*"}
+        )
+
+        # Prompt hash -> cached image path, and one lock per in-flight prompt
+        # so concurrent identical async requests share a single fetch
+        self._image_cache: "OrderedDict[str, Path]" = OrderedDict()
+        self._image_cache_lock = threading.Lock()
+        self._image_locks: weakref.WeakValueDictionary[str, asyncio.Lock] = (
+            weakref.WeakValueDictionary()
+        )
+
     def generate_ice_cream_image(
         self,
         ingredients: list[str],
@@ -55,7 +333,7 @@ class ImageGeneratorTool:
         # Try Ultra first for best quality
         if self.has_ultra:
             try:
-                print("🚀 Attempting Ultra generation for maximum quality...")
+                logger.debug("Attempting Ultra generation")
                 return self.ultra_generator.generate_ice_cream_image(
                     ingredients=ingredients,
                     scoops=scoops,
@@ -65,14 +343,29 @@ class ImageGeneratorTool:
                     height=2048,
                 )
             except Exception as e:
-                print(f"⚠️ Ultra generation failed: {e}")
-                print("🔄 Falling back to Core endpoint...")
+                logger.warning("Ultra generation failed, falling back to Core: %s", e)
 
         # Fallback to Core endpoint
         return self._generate_with_core(
             ingredients, scoops, save_to_root, filename_prefix
         )
 
+    async def generate_pooled(
+        self,
+        ingredients: list[str],
+        scoops: int = 2,
+        save_to_root: bool = True,
+        filename_prefix: str = "icecream",
+    ) -> Tuple[Optional[str], Optional[str], bool]:
+        """Await generate_ice_cream_image without blocking the event loop."""
+        return await run_in_stability_pool(
+            self.generate_ice_cream_image,
+            ingredients=ingredients,
+            scoops=scoops,
+            save_to_root=save_to_root,
+            filename_prefix=filename_prefix,
+        )
+
     async def generate_ice_cream_image_async(
         self,
         selections: list[str],
@@ -109,17 +402,20 @@ class ImageGeneratorTool:
             except ValueError:
                 scoops = 2
 
-            print(
-                f"🎨 Generating image for {player_name} with ingredients: {ingredients}"
+            logger.debug(
+                "Generating image for %s with ingredients: %s", player_name, ingredients
             )
 
-            # Call the synchronous method
-            image_url, local_path, success = self.generate_ice_cream_image(
-                ingredients=ingredients,
-                scoops=scoops,
-                save_to_root=True,
-                filename_prefix=f"icecream_{player_name.lower()}",
-            )
+            filename_prefix = f"icecream_{player_name.lower()}"
+            if self.has_ultra:
+                result = await self._hedged_generate(
+                    ingredients, scoops, filename_prefix
+                )
+            else:
+                result = await self._async_generate_with_core(
+                    ingredients, scoops, filename_prefix
+                )
+            image_url, local_path, success = result
 
             if success:
                 return {
@@ -140,7 +436,7 @@ class ImageGeneratorTool:
                 }
 
         except Exception as e:
-            print(f"❌ Async image generation failed: {e}")
+            logger.error("Async image generation failed: %s", e)
             return {"success": False, "error": f"Image generation error: {str(e)}"}
 
     def _generate_with_core(
@@ -155,256 +451,311 @@ class ImageGeneratorTool:
             # Create a detailed prompt for ice cream
             prompt = self._create_natural_language_prompt(ingredients, scoops)
 
-            print(f"🎨 Generated prompt: {prompt}")
+            logger.debug("Generated prompt: %s", prompt)
 
-            # Make request to Stability AI Core
-            headers = {"authorization": f"Bearer {self.api_key}", "accept": "image/*"}
+            cache_key = _prompt_cache_key(prompt)
+            local_path = self._reuse_cached_image(cache_key, filename_prefix)
+            if local_path is not None:
+                filename = Path(local_path).name
+                image_url = f"{src.settings.SERVER_URL}/api/v1/images/{filename}"
+                logger.debug("Reused cached Stability AI Core image: %s", local_path)
+                return image_url, local_path, True
 
+            # Make request to Stability AI Core
             files = {"none": ""}
 
             data = {"prompt": prompt, "output_format": "png", "aspect_ratio": "1:1"}
 
-            response = requests.post(
-                self.base_url, headers=headers, files=files, data=data
+            response = self._session.post(
+                self.base_url, files=files, data=data, stream=True, timeout=(5, 120)
             )
 
             if response.status_code == 200:
                 local_path = None
                 image_url = None
+                response.raw.decode_content = True
 
                 if save_to_root:
                     # Save image to project root
                     local_path = self._save_image_from_response(
-                        response.content, filename_prefix
+                        response.raw, filename_prefix, cache_key
                     )
                     # Return HTTP URL instead of file:// URL
                     filename = Path(local_path).name
                     image_url = f"{src.settings.SERVER_URL}/api/v1/images/{filename}"
-                    print(f"🖼️ Stability AI Core image saved to: {local_path}")
-                    print(f"🌐 Image accessible at: {image_url}")
+                    logger.debug("Image accessible at: %s", image_url)
                 else:
-                    # For non-save mode, save it and return HTTP URL
-                    local_path = self._save_image_from_response(
-                        response.content, filename_prefix
-                    )
-                    filename = Path(local_path).name
-                    image_url = f"{src.settings.SERVER_URL}/api/v1/images/{filename}"
+                    # Non-save mode keeps the bytes in memory, served by key
+                    content, key = _read_image(response.raw)
+                    _remember_image(key, content)
+                    image_url = f"{src.settings.SERVER_URL}/api/v1/images/mem/{key}.png"
 
                 return image_url, local_path, True
             else:
                 error_info = (
-                    response.json() if response.content else {"error": "Unknown error"}
+                    orjson.loads(response.content)
+                    if response.content
+                    else {"error": "Unknown error"}
                 )
                 raise Exception(
                     f"Stability AI Core error {response.status_code}: {error_info}"
                 )
 
         except Exception as e:
-            print(f"❌ Stability AI Core image generation failed: {e}")
+            _log_core_failure(e)
+            return None, None, False
 
-            # Check if it's an auth error and provide helpful guidance
-            if "401" in str(e) or "unauthorized" in str(e).lower():
-                print(
-                    "🔑 Authentication failed. Please ensure STABILITY_AI_KEY environment variable is set."
+    async def _hedged_generate(
+        self, ingredients: list[str], scoops: int, filename_prefix: str
+    ) -> Tuple[Optional[str], Optional[str], bool]:
+        """Run Ultra, hedging with Core if Ultra is slow or fails.
+
+        Core starts as soon as Ultra fails, or after ULTRA_HEDGE_DELAY if
+        Ultra is still running; the first successful result wins and the
+        other request is cancelled. The mock placeholder is only used once
+        both have failed.
+        """
+        logger.debug("Attempting Ultra generation")
+        ultra_task = asyncio.create_task(
+            self.ultra_generator.generate_ice_cream_image_async(
+                ingredients=ingredients,
+                scoops=scoops,
+                save_to_root=True,
+                filename_prefix=filename_prefix,
+                width=2048,
+                height=2048,
+                fallback_to_mock=False,
+            )
+        )
+        pending = {ultra_task}
+        try:
+            await asyncio.wait(pending, timeout=ULTRA_HEDGE_DELAY)
+            if ultra_task.done() and _succeeded(ultra_task):
+                return ultra_task.result()
+
+            logger.debug("Starting Core endpoint alongside Ultra")
+            pending.add(
+                asyncio.create_task(
+                    self._async_generate_with_core(ingredients, scoops, filename_prefix)
                 )
-                print(
-                    "   Get your API key from: https://platform.stability.ai/account/keys"
+            )
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
                 )
+                for task in done:
+                    if _succeeded(task):
+                        return task.result()
+                    if task.exception() is not None:
+                        logger.warning(
+                            "Image generation attempt failed: %s", task.exception()
+                        )
+        finally:
+            # Also reached when the caller is cancelled mid-wait, so a slow
+            # Ultra call never outlives the request or keeps its slot
+            for task in pending:
+                task.cancel()
+
+        logger.warning("Ultra and Core both failed, using a placeholder image")
+        return await asyncio.to_thread(
+            self.ultra_generator.generate_mock_image,
+            ingredients,
+            scoops,
+            True,
+            filename_prefix,
+        )
 
-            print("💡 Image generation requires a valid Stability AI API key.")
-            return None, None, False
+    async def _async_generate_with_core(
+        self, ingredients: list[str], scoops: int, filename_prefix: str
+    ) -> Tuple[Optional[str], Optional[str], bool]:
+        """Generate image using Core endpoint without blocking the event loop."""
         try:
-            # Create a detailed prompt for ice cream
             prompt = self._create_natural_language_prompt(ingredients, scoops)
 
-            print(f"🎨 Generated prompt: {prompt}")
+            logger.debug("Generated prompt: %s", prompt)
 
-            # Make request to Stability AI
-            headers = {"authorization": f"Bearer {self.api_key}", "accept": "image/*"}
-
-            files = {"none": ""}
-
-            data = {"prompt": prompt, "output_format": "png", "aspect_ratio": "1:1"}
-
-            response = requests.post(
-                self.base_url, headers=headers, files=files, data=data
-            )
-
-            if response.status_code == 200:
-                local_path = None
-                image_url = None
-
-                if save_to_root:
-                    # Save image to project root
-                    local_path = self._save_image_from_response(
-                        response.content, filename_prefix
-                    )
-                    # Return HTTP URL instead of file:// URL
-                    filename = Path(local_path).name
-                    image_url = f"{src.settings.SERVER_URL}/api/v1/images/{filename}"
-                    print(f"🖼️ Stability AI image saved to: {local_path}")
-                    print(f"🌐 Image accessible at: {image_url}")
-                else:
-                    # For non-save mode, save it and return HTTP URL
-                    local_path = self._save_image_from_response(
-                        response.content, filename_prefix
+            cache_key = _prompt_cache_key(prompt)
+            lock = self._image_locks.setdefault(cache_key, asyncio.Lock())
+            async with lock:
+                local_path = await asyncio.to_thread(
+                    self._reuse_cached_image, cache_key, filename_prefix
+                )
+                if local_path is None:
+                    local_path = await self._async_fetch_core(
+                        prompt, filename_prefix, cache_key
                     )
-                    filename = Path(local_path).name
-                    image_url = f"{src.settings.SERVER_URL}/api/v1/images/{filename}"
 
-                return image_url, local_path, True
-            else:
-                error_info = (
-                    response.json() if response.content else {"error": "Unknown error"}
-                )
-                raise Exception(
-                    f"Stability AI error {response.status_code}: {error_info}"
-                )
+            filename = Path(local_path).name
+            image_url = f"{src.settings.SERVER_URL}/api/v1/images/{filename}"
+            logger.debug("Image accessible at: %s", image_url)
+            return image_url, local_path, True
 
         except Exception as e:
-            print(f"❌ Stability AI image generation failed: {e}")
+            _log_core_failure(e)
+            return None, None, False
 
-            # Check if it's an auth error and provide helpful guidance
-            if "401" in str(e) or "unauthorized" in str(e).lower():
-                print(
-                    "🔑 Authentication failed. Please ensure STABILITY_AI_KEY environment variable is set."
-                )
-                print(
-                    "   Get your API key from: https://platform.stability.ai/account/keys"
+    async def _async_fetch_core(
+        self, prompt: str, filename_prefix: str, cache_key: Optional[str] = None
+    ) -> str:
+        """POST a prompt to the Core endpoint and stream the image to disk."""
+        form = aiohttp.FormData()
+        form.add_field("prompt", prompt)
+        form.add_field("output_format", "png")
+        form.add_field("aspect_ratio", "1:1")
+        form.add_field("none", b"", filename="none")
+
+        async with (
+            stability_slots,
+            _get_http_session().post(
+                self.base_url,
+                headers={
+                    "authorization": f"Bearer {self.api_key}",
+                    "accept": "image/*",
+                },
+                data=form,
+                timeout=aiohttp.ClientTimeout(total=120),
+            ) as response,
+        ):
+            if response.status != 200:
+                content = await response.read()
+                raise Exception(
+                    f"Stability AI Core error {response.status}: "
+                    f"{content.decode(errors='replace')[:200] or 'Unknown error'}"
                 )
 
-            print("💡 Image generation requires a valid Stability AI API key.")
-            return None, None, False
+            # Only the disk writes go to a worker thread
+            target = await asyncio.to_thread(
+                self._image_target, filename_prefix, cache_key
+            )
+            part_path = _part_path(target)
+            f = await asyncio.to_thread(open, part_path, "wb", IMAGE_WRITE_BUFFER)
+            try:
+                async for chunk in response.content.iter_chunked(IMAGE_CHUNK_SIZE):
+                    await asyncio.to_thread(f.write, chunk)
+                await asyncio.to_thread(f.close)
+            except BaseException:
+                f.close()
+                part_path.unlink(missing_ok=True)
+                raise
+
+        return await asyncio.to_thread(
+            self._finish_image, part_path, target, filename_prefix, cache_key
+        )
 
     def _create_natural_language_prompt(
         self, ingredients: list[str], scoops: int
     ) -> str:
-        """Create a natural language prompt for Stability AI."""
-        # Classify ingredients into flavors and toppings
-        flavors = []
-        toppings = []
-
-        # Common flavor keywords
-        flavor_keywords = [
-            "ice cream",
-            "gelato",
-            "sorbet",
-            "frozen yogurt",
-            "vanilla",
-            "chocolate",
-            "strawberry",
-            "mint",
-            "pistachio",
-            "cookie",
-            "caramel",
-            "butterscotch",
-            "rocky road",
-            "neapolitan",
-            "rainbow",
-            "tutti frutti",
-        ]
-
-        # Common topping keywords
-        topping_keywords = [
-            "sauce",
-            "syrup",
-            "sprinkles",
-            "chips",
-            "chunks",
-            "nuts",
-            "berries",
-            "fruit",
-            "whipped",
-            "fudge",
-            "drizzle",
-            "crumble",
-            "wafer",
-            "cone",
-            "candies",
-            "gummy",
-            "marshmallow",
-            "graham",
-            "oreo",
-            "brownie",
-            "cherry",
-        ]
-
-        for ingredient in ingredients:
-            ingredient_lower = ingredient.lower()
-            is_flavor = False
-            is_topping = False
-
-            # Check for flavor keywords
-            for keyword in flavor_keywords:
-                if keyword in ingredient_lower:
-                    flavors.append(ingredient)
-                    is_flavor = True
-                    break
-
-            # If not identified as flavor, check for topping keywords
-            if not is_flavor:
-                for keyword in topping_keywords:
-                    if keyword in ingredient_lower:
-                        toppings.append(ingredient)
-                        is_topping = True
-                        break
-
-            # If still not categorized, assume it's a flavor
-            if not is_flavor and not is_topping:
-                flavors.append(ingredient)
-
-        # Build the prompt
-        if scoops == 1:
-            base_text = "A single scoop of ice cream"
-        elif scoops == 2:
-            base_text = "Two scoops of ice cream"
-        else:
-            base_text = f"{scoops} scoops of ice cream"
-
-        # Add flavors
-        if flavors:
-            flavor_text = ", ".join(flavors[:3])  # Limit to 3 flavors for clarity
-            base_text += f" with {flavor_text}"
-
-        # Add toppings
-        if toppings:
-            topping_text = ", ".join(toppings[:3])  # Limit to 3 toppings
-            base_text += f" topped with {topping_text}"
-
-        # Determine serving style
-        if scoops <= 2:
-            container = "in a waffle cone"
-        else:
-            container = "served in a bowl"
-
-        # Final prompt
-        prompt = (
-            f"Professional food photography of {base_text}, {container}. "
-            f"Photorealistic, high-quality image with soft lighting, clean background, "
-            f"appetizing presentation, slightly melting texture. Studio lighting with "
-            f"soft shadows. Commercial food photography style."
-        )
+        """Create a natural language prompt for Stability AI.
 
-        return prompt
+        Ingredients are lowercased and sorted first, so the same selection in
+        any order or casing hits both the prompt and the image cache.
+        """
+        key = tuple(sorted(ingredient.lower() for ingredient in ingredients))
+        return _natural_language_prompt(key, scoops)
 
     def _save_image_from_response(
-        self, image_content: bytes, filename_prefix: str
+        self,
+        image_stream: BinaryIO,
+        filename_prefix: str,
+        cache_key: Optional[str] = None,
     ) -> str:
-        """Save image data from response content to project root."""
-        # Get project root directory (2 levels up from this file)
-        project_root = Path(__file__).resolve().parents[2]
+        """Stream image data from a response body to project root."""
+        target = self._image_target(filename_prefix, cache_key)
+        part_path = _part_path(target)
+        try:
+            with open(part_path, "wb", buffering=IMAGE_WRITE_BUFFER) as f:
+                shutil.copyfileobj(image_stream, f, IMAGE_CHUNK_SIZE)
+        except BaseException:
+            part_path.unlink(missing_ok=True)
+            raise
+        return self._finish_image(part_path, target, filename_prefix, cache_key)
+
+    def _image_target(self, filename_prefix: str, cache_key: Optional[str]) -> Path:
+        """Where a new image is written: the prompt cache, or the project root.
+
+        With a cache_key the image is stored once in IMAGE_CACHE_DIR and the
+        timestamped file is linked to that copy by _finish_image.
+        """
+        if cache_key is None:
+            return self._new_image_path(filename_prefix)
+        IMAGE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        return IMAGE_CACHE_DIR / f"{cache_key}.png"
+
+    def _finish_image(
+        self,
+        part_path: Path,
+        target: Path,
+        filename_prefix: str,
+        cache_key: Optional[str],
+    ) -> str:
+        """Move a fully written image into place and return its served path."""
+        # Renaming only complete files keeps partial downloads out of the cache
+        os.replace(part_path, target)
+        file_path = target
+        if cache_key is not None:
+            self._remember_cache_path(cache_key, target)
+            file_path = self._link_image(target, filename_prefix)
+            _prune_image_cache()
+
+        logger.debug("Stability AI image saved to: %s", file_path)
+        return str(file_path)
 
-        # Create filename with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{filename_prefix}_stability_{timestamp}.png"
-        file_path = project_root / filename
+    def _reuse_cached_image(
+        self, cache_key: str, filename_prefix: str
+    ) -> Optional[str]:
+        """Link a previously generated image for this prompt, if one exists."""
+        cache_path = self._image_cache.get(cache_key) or (
+            IMAGE_CACHE_DIR / f"{cache_key}.png"
+        )
+        try:
+            # Refresh the mtime so pruning treats the entry as recently used
+            os.utime(cache_path)
+        except FileNotFoundError:
+            with self._image_cache_lock:
+                self._image_cache.pop(cache_key, None)
+            return None
+        self._remember_cache_path(cache_key, cache_path)
+        return str(self._link_image(cache_path, filename_prefix))
+
+    def _remember_cache_path(self, cache_key: str, cache_path: Path) -> None:
+        """Record a prompt's cache path, evicting the least recently used."""
+        with self._image_cache_lock:
+            self._image_cache[cache_key] = cache_path
+            self._image_cache.move_to_end(cache_key)
+            while len(self._image_cache) > IMAGE_PATH_CACHE_LIMIT:
+                self._image_cache.popitem(last=False)
+
+    def _link_image(self, cache_path: Path, filename_prefix: str) -> Path:
+        """Expose a cached image under a fresh timestamped name.
+
+        The link (or copy) is made under a temporary name and renamed into
+        place, so an existing file at that path, possibly a hard link into
+        the cache, is replaced rather than written through.
+        """
+        file_path = self._new_image_path(filename_prefix)
+        part_path = _part_path(file_path)
+        try:
+            try:
+                os.link(cache_path, part_path)
+            except OSError:
+                shutil.copyfile(cache_path, part_path)
+            os.replace(part_path, file_path)
+        except BaseException:
+            part_path.unlink(missing_ok=True)
+            raise
+        return file_path
 
-        # Save image content directly
-        with open(file_path, "wb") as f:
-            f.write(image_content)
+    def _new_image_path(self, filename_prefix: str) -> Path:
+        """Unique timestamped image path in the project root."""
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        unique = f"{os.getpid()}_{next(_part_ids)}"
+        return PROJECT_ROOT / f"{filename_prefix}_stability_{timestamp}_{unique}.png"
 
-        print(f"🖼️ Stability AI image saved to: {file_path}")
-        return str(file_path)
+
+@functools.cache
+def get_image_generator() -> ImageGeneratorTool:
+    """Return the process-wide ImageGeneratorTool, building it on first use."""
+    return ImageGeneratorTool()
 
 
 # Convenience function for easy integration
@@ -417,7 +768,7 @@ def generate_ice_cream_image(
     Returns:
         Tuple of (image_url, local_file_path, success)
     """
-    generator = ImageGeneratorTool()
+    generator = get_image_generator()
     return generator.generate_ice_cream_image(
         ingredients=ingredients, scoops=scoops, save_to_root=save_to_root
     )
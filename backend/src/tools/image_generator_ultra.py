@@ -1,14 +1,532 @@
 """Advanced image generation tool using Stability AI Ultra endpoint with specification-based prompts."""
 
+import asyncio
+import functools
+import hashlib
+import os
 import random
+import itertools
+import logging
+import re
+import shutil
+import aiohttp
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Tuple, Dict, Any
+from typing import Optional, Tuple, Dict, Any, BinaryIO, Union
 from io import BytesIO
-from PIL import Image
 
 import src.settings
+from src.tools.stability_limits import stability_slots
+
+logger = logging.getLogger(__name__)
+
+try:
+    from src.tools.mock_image_generator import MockImageGeneratorTool
+except ImportError:
+    MockImageGeneratorTool = None
+
+# Generated images are saved in the project root (2 levels up from this file)
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+# Raw Ultra responses keyed by a hash of their spec (minus the random seed),
+# pruned least recently used first once they exceed ULTRA_CACHE_MAX_BYTES
+ULTRA_CACHE_DIR = PROJECT_ROOT / "images" / "cache"
+ULTRA_CACHE_MAX_BYTES = 2 * 1024**3
+
+# Read size for streamed Ultra responses
+ULTRA_CHUNK_SIZE = 64 * 1024
+
+# Unique suffixes for output and in-progress files, across threads and coroutines
+_part_ids = itertools.count()
+
+
+def _part_path(target: Path) -> Path:
+    """Unique temporary name a new file is written under before the rename."""
+    return target.with_name(f"{target.name}.{os.getpid()}.{next(_part_ids)}.part")
+
+
+def _cache_key(spec: Dict[str, Any]) -> str:
+    """Hash a spec into its cache key, ignoring the per-call random seed.
+
+    Case and runs of whitespace are folded too, so ingredient names that only
+    differ in spelling style ("Vanilla  Ice Cream" / "vanilla ice cream")
+    share an entry.
+    """
+    output = {k: v for k, v in spec.get("output", {}).items() if k != "seed"}
+    canonical = orjson.dumps({**spec, "output": output}, option=orjson.OPT_SORT_KEYS)
+    canonical = b" ".join(canonical.lower().split())
+    return hashlib.blake2b(canonical, digest_size=16).hexdigest()
+
+
+def _read_body(response: requests.Response) -> bytes:
+    """Read a streamed response body, filling a preallocated buffer if sized."""
+    length = response.headers.get("Content-Length")
+    if length and "Content-Encoding" not in response.headers:
+        buf = bytearray(int(length))
+        view = memoryview(buf)
+        pos = 0
+        for chunk in response.iter_content(ULTRA_CHUNK_SIZE):
+            end = pos + len(chunk)
+            view[pos:end] = chunk
+            pos = end
+        if pos == len(buf):
+            return bytes(buf)
+        raise requests.exceptions.ChunkedEncodingError(
+            f"Response ended after {pos} of {len(buf)} bytes"
+        )
+
+    buf = bytearray()
+    for chunk in response.iter_content(ULTRA_CHUNK_SIZE):
+        buf += chunk
+    return bytes(buf)
+
+
+def _seed32() -> int:
+    """Random seed in Ultra's 1..4294967294 range from one 32-bit draw."""
+    seed = random.getrandbits(32)
+    return seed if 1 <= seed <= 4294967294 else 1
+
+
+def _output_size(width: int, height: int) -> Tuple[int, int]:
+    """Output size for a spec, snapping modest square requests to native."""
+    native_w, native_h = NATIVE_ULTRA_SIZES["1:1"]
+    if width == height and width < native_w * NATIVE_SIZE_UPSCALE_FACTOR:
+        return native_w, native_h
+    return width, height
+
+
+def _ultra_error(status: int, content: bytes) -> RuntimeError:
+    """Build the error raised for a non-200 Ultra response."""
+    try:
+        error_info = orjson.loads(content)
+    except orjson.JSONDecodeError:
+        error_info = content.decode(errors="replace")[:200]
+    return RuntimeError(f"Stability API error {status}: {error_info}")
+
+
+def _prune_cache() -> None:
+    """Delete the least recently used cached Ultra images beyond the size cap."""
+    entries = []
+    for path in ULTRA_CACHE_DIR.glob("ultra_*"):
+        if path.suffix == ".part":
+            continue
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = 0
+    for _, size, path in sorted(entries, reverse=True):
+        total += size
+        if total > ULTRA_CACHE_MAX_BYTES:
+            path.unlink(missing_ok=True)
+
+
+# Topping keywords, matched as case-insensitive substrings. Liquids are
+# applied first and solids on top; ingredients matching neither are flavors.
+LIQUID_TOPPING_KEYWORDS = (
+    "sauce",
+    "syrup",
+    "drizzle",
+    "fudge",
+    "caramel sauce",
+    "chocolate sauce",
+    "strawberry sauce",
+    "hot fudge",
+    "butterscotch sauce",
+    "whipped cream",
+)
+SOLID_TOPPING_KEYWORDS = (
+    "sprinkles",
+    "chips",
+    "chunks",
+    "nuts",
+    "berries",
+    "fruit",
+    "crumble",
+    "wafer",
+    "candies",
+    "gummy",
+    "marshmallow",
+    "graham",
+    "oreo",
+    "brownie",
+    "cherry",
+    "jimmies",
+    "confetti",
+    "coconut",
+)
+_LIQUID_TOPPING_RE = re.compile(
+    "|".join(map(re.escape, LIQUID_TOPPING_KEYWORDS)), re.IGNORECASE
+)
+_SOLID_TOPPING_RE = re.compile(
+    "|".join(map(re.escape, SOLID_TOPPING_KEYWORDS)), re.IGNORECASE
+)
+
+# Every palette starts from the cream, white and beige base and keeps at
+# most PALETTE_LIMIT colors
+PALETTE_BASE = ("#F7F3E9", "#FFFFFF", "#FFF8DC")
+PALETTE_LIMIT = 6
+SPRINKLE_COLORS = ("#FF6B6B", "#4ECDC4", "#FFE66D")
+
+# Palette colors for the first matching keyword, in priority order
+FLAVOR_COLORS = (
+    ("chocolate", "#8B4513"),
+    ("strawberry", "#FFB6C1"),
+    ("mint", "#98FB98"),
+    ("caramel", "#C57A40"),
+    ("pistachio", "#93C572"),
+)
+TOPPING_COLORS = (
+    ("chocolate", ("#3A2B1A",)),
+    ("sprinkles", SPRINKLE_COLORS),
+)
+
+
+# Prompt templates rendered with str.format_map; both share the closing
+# framing/lighting/camera sentences
+_PROMPT_TAIL = (
+    "Framing: {framing}, {shot}, angle {angle}, negative space {negative_space}. "
+    "Lighting: {lighting}. Surface detail: {surface_detail}. "
+    "Color palette: {palette}. "
+    "Background: {background_type} {background_color}. "
+    "Camera feel: {focal_length_mm}mm, f/{aperture_f}."
+)
+EMPTY_CONE_PROMPT_TEMPLATE = (
+    "Photorealistic EMPTY waffle ice cream cone with NO ice cream scoops, completely EMPTY and unused. "
+    "ABSOLUTELY NO ice cream, NO scoops, NO toppings, NO food items whatsoever. "
+    "Just a clean, empty, pristine waffle cone standing alone. "
+    "IMPORTANT: The cone must be completely EMPTY with NO ice cream inside or on top. "
+    + _PROMPT_TAIL
+)
+FILLED_CONE_PROMPT_TEMPLATE = (
+    "Photorealistic {subject_type} with perfect layer structure. "
+    "SINGLE waffle cone only - exactly ONE cone with ALL scoops stacked on top. "
+    "{structure} "
+    "MANDATORY: Must be served in a waffle cone with visible waffle texture pattern. "
+    "CRITICAL: Only ONE cone in the entire image - all scoops must be stacked on this single cone. "
+    "IMPORTANT: All toppings must be placed ON TOP of the highest scoop, never between scoops. "
+    "State: {state}. Perfect stacking with no floating or mixed scoops, toppings only on the very top. "
+    + _PROMPT_TAIL
+)
+
+
+# Negative prompts are fixed per cone type; the Ultra request joins them into
+# one field, so the joined text is precomputed too
+FILLED_CONE_NEGATIVE_PROMPT = (
+    "hands",
+    "text",
+    "logos",
+    "watermarks",
+    "multiple_cones",
+    "multiple_waffle_cones",
+    "two_cones",
+    "three_cones",
+    "several_cones",
+    "many_cones",
+    "separate_cones",
+    "individual_cones",
+    "multiple_ice_creams",
+    "side_by_side_cones",
+    "deformed_ice_cream",
+    "plastic_or_cartoon_style",
+    "artificial_colors",
+    "oversaturated",
+    "mixed_scoops",
+    "unstacked_scoops",
+    "floating_scoops",
+    "bowl",
+    "cup",
+    "sugar_cone",
+    "plain_cone",
+    "cake_cone",
+    "paper_cup",
+    "glass_bowl",
+    "ceramic_bowl",
+    "plastic_container",
+    "toppings_between_scoops",
+    "sauce_between_layers",
+    "sprinkles_between_scoops",
+    "layered_toppings",
+    "mixed_layers",
+    "toppings_in_middle",
+)
+
+EMPTY_CONE_NEGATIVE_PROMPT = (
+    "ice_cream",
+    "ice cream",
+    "scoops",
+    "scoop",
+    "melting",
+    "toppings",
+    "sauce",
+    "sprinkles",
+    "chips",
+    "any_food_items",
+    "dessert_toppings",
+    "sweet_toppings",
+    "frozen_dessert",
+    "dairy_products",
+    "cream",
+    "vanilla",
+    "chocolate",
+    "strawberry",
+    "flavors",
+    "hands",
+    "text",
+    "logos",
+    "watermarks",
+    "deformed_cone",
+    "filled_cone",
+    "topped_cone",
+)
+
+_NEGATIVE_PROMPT_TEXT = {
+    prompt: ", ".join(prompt)
+    for prompt in (FILLED_CONE_NEGATIVE_PROMPT, EMPTY_CONE_NEGATIVE_PROMPT)
+}
+
+# Appended to the prompt of the second image when generating variations
+VARIATION_PROMPT = "Subtle variation in drizzle pattern and sprinkle distribution."
+
+# Spec sections that never vary between calls. Specs share these objects,
+# so they must not be mutated
+_BACKGROUND = {"type": "solid_color", "color": "#F8F9FA"}  # Clean light background
+_LOOK_BASE = {
+    "style": "photorealistic",
+    "lighting": "soft_diffused_front",
+    "surface_detail": "high",
+}
+_STATE_BY_SCOOPS = {
+    1: "perfectly_formed",
+    2: "slightly_melting",
+    3: "slightly_melting",
+}
+_FILLED_CONE_CONSTRAINTS = {
+    "brand_safe": True,
+    "no_background_clutter": True,
+    "proper_stacking": True,
+}
+_EMPTY_CONE_LOOK = {
+    **_LOOK_BASE,
+    "color_palette": ("#D2B48C", "#F5DEB3", "#FAEBD7"),  # Cone colors
+}
+_EMPTY_CONE_COMPOSITION = {
+    "framing": "centered",
+    "shot": "close_up",
+    "angle": "slight_angle",
+    "negative_space": "ample",
+}
+_EMPTY_CONE_CAMERA = {"focal_length_mm": 50, "aperture_f": 2.8}
+_EMPTY_CONE_CONSTRAINTS = {
+    "brand_safe": True,
+    "no_background_clutter": True,
+    "empty_cone_only": True,
+}
+
+# Size Ultra returns for each aspect ratio (about one megapixel)
+NATIVE_ULTRA_SIZES = {"1:1": (1024, 1024)}
+
+# Formats Ultra can return; Pillow only probes these plugins when decoding
+ULTRA_IMAGE_FORMATS = ("PNG", "JPEG", "WEBP")
+
+# Square requests below this multiple of the native size are served at the
+# native size instead of being resized on the CPU
+NATIVE_SIZE_UPSCALE_FACTOR = 1.5
+
+
+@functools.lru_cache(maxsize=128)
+def _spec_skeleton(
+    ingredients: Tuple[str, ...], scoops: int, width: int, height: int
+) -> Dict[str, Any]:
+    """Build the seedless spec for _create_ice_cream_spec.
+
+    The result is shared between calls: its nested sequences are tuples and
+    callers must copy any dict they change.
+    """
+
+    # Analyze ingredients with proper ordering
+    flavors, ordered_toppings = _analyze_ingredients(ingredients)
+
+    # Handle empty cone case (0 flavors/scoops)
+    if scoops == 0 or not flavors:
+        return _create_empty_cone_spec(width, height)
+
+    # Ensure we don't exceed the number of requested scoops
+    available_flavors = flavors[:scoops] if len(flavors) >= scoops else flavors
+
+    # Create ordered scoop description for stacking
+    stacked_scoops = _create_stacking_description(available_flavors, scoops)
+
+    # Small square requests are served at Ultra's native size, unresized
+    out_width, out_height = _output_size(width, height)
+
+    # Determine container based on scoops - ALWAYS use waffle cone (MANDATORY)
+    container = "waffle_cone"  # MANDATORY: Always use waffle cone
+
+    state = _STATE_BY_SCOOPS.get(scoops, "creamy_soft")
+
+    # Create comprehensive specification
+    spec = {
+        "version": "1.0",
+        "task": "generate_image",
+        "subject": {
+            "type": "ice_cream_dessert",
+            "scoops": scoops,
+            "flavors": tuple(available_flavors),
+            "stacking_order": stacked_scoops,
+            "container": container,
+            "toppings": tuple(ordered_toppings[:4]),  # Limit to 4 toppings
+            "topping_application": "liquid_first_then_solid",
+            "state": state,
+        },
+        "look": {
+            **_LOOK_BASE,
+            "color_palette": _get_color_palette(available_flavors, ordered_toppings),
+        },
+        "composition": {
+            "framing": "centered",
+            "shot": "close_up" if scoops <= 2 else "medium_shot",
+            "angle": "eye_level",
+            "negative_space": "ample",
+        },
+        "camera": {"focal_length_mm": 50 if scoops <= 2 else 85, "aperture_f": 2.8},
+        "background": _BACKGROUND,
+        "output": {
+            "aspect_ratio": "1:1",
+            "width": out_width,
+            "height": out_height,
+            "format": "png",
+        },
+        "negative_prompt": FILLED_CONE_NEGATIVE_PROMPT,
+        "constraints": _FILLED_CONE_CONSTRAINTS,
+    }
+
+    return spec
+
+
+def _create_empty_cone_spec(width: int, height: int) -> Dict[str, Any]:
+    """Create specification (without seed) for empty cone when no flavors are provided."""
+    # Small square requests are served at Ultra's native size, unresized
+    out_width, out_height = _output_size(width, height)
+    spec = {
+        "version": "1.0",
+        "task": "generate_image",
+        "subject": {
+            "type": "empty_ice_cream_cone",
+            "scoops": 0,
+            "flavors": (),
+            "container": "waffle_cone",
+            "toppings": (),
+            "state": "empty_clean",
+        },
+        "look": _EMPTY_CONE_LOOK,
+        "composition": _EMPTY_CONE_COMPOSITION,
+        "camera": _EMPTY_CONE_CAMERA,
+        "background": _BACKGROUND,
+        "output": {
+            "aspect_ratio": "1:1",
+            "width": out_width,
+            "height": out_height,
+            "format": "png",
+        },
+        "negative_prompt": EMPTY_CONE_NEGATIVE_PROMPT,
+        "constraints": _EMPTY_CONE_CONSTRAINTS,
+    }
+    return spec
+
+
+def _create_stacking_description(flavors: list[str], scoops: int) -> str:
+    """Create a description of how scoops should be stacked in order."""
+    if scoops == 0 or not flavors:
+        return "no_scoops"
+
+    if scoops == 1:
+        return f"single scoop of {flavors[0]} on top"
+
+    # Build stacking description from bottom to top
+    stack_parts = []
+
+    for i in range(min(scoops, len(flavors))):
+        if i == 0:
+            stack_parts.append(f"bottom scoop: {flavors[i]}")
+        elif i == scoops - 1:
+            stack_parts.append(f"top scoop: {flavors[i]}")
+        else:
+            stack_parts.append(f"middle scoop {i}: {flavors[i]}")
+
+    # If we have more scoops than flavors, repeat the last flavor
+    if scoops > len(flavors):
+        remaining_scoops = scoops - len(flavors)
+        last_flavor = flavors[-1] if flavors else "vanilla ice cream"
+        for i in range(remaining_scoops):
+            stack_parts.append(f"additional scoop: {last_flavor}")
+
+    return " stacked with ".join(stack_parts)
+
+
+def _analyze_ingredients(ingredients: list[str]) -> Tuple[list[str], list[str]]:
+    """Analyze ingredients and categorize into flavors and toppings with proper ordering."""
+    flavors = []
+    liquid_toppings = []
+    solid_toppings = []
+
+    # One scan over all names first; a category with no match anywhere is
+    # skipped per ingredient (keywords never contain the NUL separator)
+    joined = "\x00".join(ingredients)
+    liquid_re = _LIQUID_TOPPING_RE if _LIQUID_TOPPING_RE.search(joined) else None
+    solid_re = _SOLID_TOPPING_RE if _SOLID_TOPPING_RE.search(joined) else None
+    if liquid_re is None and solid_re is None:
+        return list(ingredients), []
+
+    for ingredient in ingredients:
+        # Liquid toppings are checked FIRST, then solid toppings; anything
+        # else (including every flavor keyword) is a flavor
+        if liquid_re and liquid_re.search(ingredient):
+            liquid_toppings.append(ingredient)
+        elif solid_re and solid_re.search(ingredient):
+            solid_toppings.append(ingredient)
+        else:
+            flavors.append(ingredient)
+
+    # Combine toppings in proper order: liquids first, then solids
+    ordered_toppings = liquid_toppings + solid_toppings
+
+    return flavors, ordered_toppings
+
+
+def _get_color_palette(flavors: list[str], toppings: list[str]) -> Tuple[str, ...]:
+    """Generate appropriate color palette based on flavors and toppings."""
+    # Base palette for ice cream
+    palette = list(PALETTE_BASE)
+
+    # Add flavor-specific colors; later matches could only be cut off, so
+    # both loops stop once the palette is full
+    for flavor in flavors:
+        if len(palette) >= PALETTE_LIMIT:
+            break
+        flavor_lower = flavor.lower()
+        for keyword, color in FLAVOR_COLORS:
+            if keyword in flavor_lower:
+                palette.append(color)
+                break
+
+    # Add topping-specific colors
+    for topping in toppings:
+        if len(palette) >= PALETTE_LIMIT:
+            break
+        topping_lower = topping.lower()
+        for keyword, colors in TOPPING_COLORS:
+            if keyword in topping_lower:
+                palette.extend(colors)
+                break
+
+    return tuple(palette[:PALETTE_LIMIT])
 
 
 class ImageGeneratorUltraTool:
@@ -24,6 +542,50 @@ class ImageGeneratorUltraTool:
         self.api_key = src.settings.STABILITY_AI_KEY
         self.ultra_url = "https://api.stability.ai/v2beta/stable-image/generate/ultra"
 
+        # Keep-alive session so repeat generations skip the TCP/TLS handshake
+        self._session = requests.Session()
+        self._session.mount(
+            "https://",
+            HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=8,
+                max_retries=Retry(
+                    total=3,
+                    backoff_factor=0.5,
+                    status_forcelist=(429, 500, 502, 503, 504),
+                    allowed_methods=frozenset(["POST"]),
+                ),
+            ),
+        )
+        self._session.headers.update(
+            {"Authorization": f"Bearer {self.api_key}", "Accept": "image/*"}
+        )
+        # aiohttp session for the async entry point, opened on first use
+        self._aio_session: Optional[aiohttp.ClientSession] = None
+
+    def close(self) -> None:
+        """Release the pooled HTTP connections."""
+        self._session.close()
+
+    async def aclose(self) -> None:
+        """Close the async session if it is open."""
+        if self._aio_session is not None:
+            await self._aio_session.close()
+            self._aio_session = None
+
+    def _get_aio_session(self) -> aiohttp.ClientSession:
+        """Return the async keep-alive session, opening it on first use."""
+        if self._aio_session is None or self._aio_session.closed:
+            self._aio_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=8, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=180),
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Accept": "image/*",
+                },
+            )
+        return self._aio_session
+
     def generate_ice_cream_image(
         self,
         ingredients: list[str],
@@ -42,7 +604,8 @@ class ImageGeneratorUltraTool:
             scoops: Number of scoops
             save_to_root: Whether to save image to project root
             filename_prefix: Prefix for saved filename
-            width: Output image width
+            width: Output image width (square requests under 1.5x the native
+                1024px are returned at the native size)
             height: Output image height
             generate_variations: Whether to generate multiple variations
 
@@ -52,13 +615,7 @@ class ImageGeneratorUltraTool:
         try:
             # Create specification from ingredients
             spec = self._create_ice_cream_spec(ingredients, scoops, width, height)
-
-            print("🎯 Generated specification:")
-            print(
-                f"  Subject: {spec['subject']['type']} with {spec['subject']['scoops']} scoops"
-            )
-            print(f"  Flavors: {', '.join(spec['subject']['flavors'])}")
-            print(f"  Toppings: {', '.join(spec['subject']['toppings'])}")
+            self._log_spec(spec)
 
             if generate_variations:
                 # Generate two variations
@@ -68,394 +625,153 @@ class ImageGeneratorUltraTool:
                 if filepaths:
                     primary_path = filepaths[0]
                     if save_to_root:
-                        filename = Path(primary_path).name
-                        image_url = (
-                            f"{src.settings.SERVER_URL}/api/v1/images/{filename}"
-                        )
-                        print(f"🌐 Image accessible at: {image_url}")
+                        image_url = self._image_url(primary_path)
+                        logger.debug("Image accessible at: %s", image_url)
                     else:
                         image_url = None
                     return image_url, primary_path, True
             else:
                 # Generate single image
-                image_bytes = self._call_ultra(spec)
+                cache_path = self._call_ultra_cached(spec)
 
                 if save_to_root:
-                    local_path = self._save_image_from_bytes(
-                        image_bytes, filename_prefix, spec
+                    local_path = self._save_image_from_cache(
+                        cache_path, filename_prefix, spec
                     )
                     # Return HTTP URL instead of file:// URL
-                    filename = Path(local_path).name
-                    image_url = f"{src.settings.SERVER_URL}/api/v1/images/{filename}"
-                    print(f"🖼️ Stability AI Ultra image saved to: {local_path}")
-                    print(f"🌐 Image accessible at: {image_url}")
+                    image_url = self._image_url(local_path)
+                    logger.debug("Image accessible at: %s", image_url)
                     return image_url, local_path, True
 
             return None, None, False
 
         except Exception as e:
-            print(f"❌ Stability AI Ultra image generation failed: {e}")
-            print("🔄 Falling back to mock image generation...")
-
-            # Fallback to mock generation
-            try:
-                from src.tools.mock_image_generator import MockImageGeneratorTool
-
-                mock_generator = MockImageGeneratorTool()
-                return mock_generator.generate_ice_cream_image(
-                    ingredients, scoops, save_to_root, filename_prefix
-                )
-            except Exception as mock_error:
-                print(f"❌ Mock generation also failed: {mock_error}")
-                return None, None, False
-
-    def _create_ice_cream_spec(
-        self, ingredients: list[str], scoops: int, width: int, height: int
-    ) -> Dict[str, Any]:
-        """Create a detailed specification for ice cream image generation with proper stacking logic."""
+            logger.error("Stability AI Ultra image generation failed: %s", e)
+            return self.generate_mock_image(
+                ingredients, scoops, save_to_root, filename_prefix
+            )
 
-        # Analyze ingredients with proper ordering
-        flavors, ordered_toppings = self._analyze_ingredients(ingredients)
+    async def generate_ice_cream_image_async(
+        self,
+        ingredients: list[str],
+        scoops: int = 2,
+        save_to_root: bool = True,
+        filename_prefix: str = "icecream",
+        width: int = 512,
+        height: int = 512,
+        generate_variations: bool = False,
+        fallback_to_mock: bool = True,
+    ) -> Tuple[Optional[str], Optional[str], bool]:
+        """Async counterpart of generate_ice_cream_image.
 
-        # Handle empty cone case (0 flavors/scoops)
-        if scoops == 0 or not flavors:
-            return self._create_empty_cone_spec(width, height)
+        Ultra is called through aiohttp, so many generations can be in flight
+        on one event loop; cache and file I/O run on worker threads. With
+        fallback_to_mock=False a failure returns (None, None, False) instead
+        of a placeholder, so the caller can try another endpoint first.
+        """
+        try:
+            spec = self._create_ice_cream_spec(ingredients, scoops, width, height)
+            self._log_spec(spec)
 
-        # Ensure we don't exceed the number of requested scoops
-        available_flavors = flavors[:scoops] if len(flavors) >= scoops else flavors
+            if generate_variations:
+                img1, img2 = await asyncio.gather(
+                    self._call_ultra_async(spec),
+                    self._call_ultra_async(
+                        self._variation_spec(spec), VARIATION_PROMPT
+                    ),
+                )
+                if save_to_root:
+                    local_path = await asyncio.to_thread(
+                        self._save_image_from_bytes,
+                        img1,
+                        f"{filename_prefix}_var1",
+                        spec,
+                    )
+                    await asyncio.to_thread(
+                        self._save_image_from_bytes,
+                        img2,
+                        f"{filename_prefix}_var2",
+                        spec,
+                    )
+                    image_url = self._image_url(local_path)
+                    logger.debug("Image accessible at: %s", image_url)
+                    return image_url, local_path, True
+            else:
+                cache_path = await self._call_ultra_cached_async(spec)
 
-        # Create ordered scoop description for stacking
-        stacked_scoops = self._create_stacking_description(available_flavors, scoops)
+                if save_to_root:
+                    local_path = await asyncio.to_thread(
+                        self._save_image_from_cache,
+                        cache_path,
+                        filename_prefix,
+                        spec,
+                    )
+                    image_url = self._image_url(local_path)
+                    logger.debug("Image accessible at: %s", image_url)
+                    return image_url, local_path, True
 
-        # Determine container based on scoops - ALWAYS use waffle cone (MANDATORY)
-        container = "waffle_cone"  # MANDATORY: Always use waffle cone
+            return None, None, False
 
-        if scoops == 1:
-            state = "perfectly_formed"
-        elif scoops <= 3:
-            state = "slightly_melting"
-        else:
-            state = "creamy_soft"
-
-        # Create comprehensive specification
-        spec = {
-            "version": "1.0",
-            "task": "generate_image",
-            "subject": {
-                "type": "ice_cream_dessert",
-                "scoops": scoops,
-                "flavors": available_flavors,
-                "stacking_order": stacked_scoops,
-                "container": container,
-                "toppings": ordered_toppings[:4],  # Limit to 4 toppings
-                "topping_application": "liquid_first_then_solid",
-                "state": state,
-            },
-            "look": {
-                "style": "photorealistic",
-                "lighting": "soft_diffused_front",
-                "surface_detail": "high",
-                "color_palette": self._get_color_palette(
-                    available_flavors, ordered_toppings
-                ),
-            },
-            "composition": {
-                "framing": "centered",
-                "shot": "close_up" if scoops <= 2 else "medium_shot",
-                "angle": "eye_level",
-                "negative_space": "ample",
-            },
-            "camera": {"focal_length_mm": 50 if scoops <= 2 else 85, "aperture_f": 2.8},
-            "background": {
-                "type": "solid_color",
-                "color": "#F8F9FA",  # Clean light background
-            },
-            "output": {
-                "aspect_ratio": "1:1",
-                "width": width,
-                "height": height,
-                "format": "png",
-                "seed": random.randint(1, 4294967294),
-            },
-            "negative_prompt": [
-                "hands",
-                "text",
-                "logos",
-                "watermarks",
-                "multiple_cones",
-                "multiple_waffle_cones",
-                "two_cones",
-                "three_cones",
-                "several_cones",
-                "many_cones",
-                "separate_cones",
-                "individual_cones",
-                "multiple_ice_creams",
-                "side_by_side_cones",
-                "deformed_ice_cream",
-                "plastic_or_cartoon_style",
-                "artificial_colors",
-                "oversaturated",
-                "mixed_scoops",
-                "unstacked_scoops",
-                "floating_scoops",
-                "bowl",
-                "cup",
-                "sugar_cone",
-                "plain_cone",
-                "cake_cone",
-                "paper_cup",
-                "glass_bowl",
-                "ceramic_bowl",
-                "plastic_container",
-                "toppings_between_scoops",
-                "sauce_between_layers",
-                "sprinkles_between_scoops",
-                "layered_toppings",
-                "mixed_layers",
-                "toppings_in_middle",
-            ],
-            "constraints": {
-                "brand_safe": True,
-                "no_background_clutter": True,
-                "proper_stacking": True,
-            },
-        }
+        except Exception as e:
+            logger.error("Stability AI Ultra image generation failed: %s", e)
+            if not fallback_to_mock:
+                return None, None, False
+            return await asyncio.to_thread(
+                self.generate_mock_image,
+                ingredients,
+                scoops,
+                save_to_root,
+                filename_prefix,
+            )
 
-        return spec
-
-    def _create_empty_cone_spec(self, width: int, height: int) -> Dict[str, Any]:
-        """Create specification for empty cone when no flavors are provided."""
-        spec = {
-            "version": "1.0",
-            "task": "generate_image",
-            "subject": {
-                "type": "empty_ice_cream_cone",
-                "scoops": 0,
-                "flavors": [],
-                "container": "waffle_cone",
-                "toppings": [],
-                "state": "empty_clean",
-            },
-            "look": {
-                "style": "photorealistic",
-                "lighting": "soft_diffused_front",
-                "surface_detail": "high",
-                "color_palette": ["#D2B48C", "#F5DEB3", "#FAEBD7"],  # Cone colors
-            },
-            "composition": {
-                "framing": "centered",
-                "shot": "close_up",
-                "angle": "slight_angle",
-                "negative_space": "ample",
-            },
-            "camera": {"focal_length_mm": 50, "aperture_f": 2.8},
-            "background": {"type": "solid_color", "color": "#F8F9FA"},
-            "output": {
-                "aspect_ratio": "1:1",
-                "width": width,
-                "height": height,
-                "format": "png",
-                "seed": random.randint(1, 4294967294),
-            },
-            "negative_prompt": [
-                "ice_cream",
-                "ice cream",
-                "scoops",
-                "scoop",
-                "melting",
-                "toppings",
-                "sauce",
-                "sprinkles",
-                "chips",
-                "any_food_items",
-                "dessert_toppings",
-                "sweet_toppings",
-                "frozen_dessert",
-                "dairy_products",
-                "cream",
-                "vanilla",
-                "chocolate",
-                "strawberry",
-                "flavors",
-                "hands",
-                "text",
-                "logos",
-                "watermarks",
-                "deformed_cone",
-                "filled_cone",
-                "topped_cone",
-            ],
-            "constraints": {
-                "brand_safe": True,
-                "no_background_clutter": True,
-                "empty_cone_only": True,
-            },
-        }
-        return spec
+    def _log_spec(self, spec: Dict[str, Any]) -> None:
+        """Log a short summary of a generated specification."""
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        subject = spec["subject"]
+        logger.debug(
+            "Generated specification: %s with %d scoops; flavors: %s; toppings: %s",
+            subject["type"],
+            subject["scoops"],
+            ", ".join(subject["flavors"]),
+            ", ".join(subject["toppings"]),
+        )
 
-    def _create_stacking_description(self, flavors: list[str], scoops: int) -> str:
-        """Create a description of how scoops should be stacked in order."""
-        if scoops == 0 or not flavors:
-            return "no_scoops"
+    def _image_url(self, local_path: str) -> str:
+        """Return the HTTP URL an image saved to the project root is served at."""
+        return f"{src.settings.SERVER_URL}/api/v1/images/{Path(local_path).name}"
 
-        if scoops == 1:
-            return f"single scoop of {flavors[0]} on top"
+    def generate_mock_image(
+        self,
+        ingredients: list[str],
+        scoops: int,
+        save_to_root: bool,
+        filename_prefix: str,
+    ) -> Tuple[Optional[str], Optional[str], bool]:
+        """Generate a placeholder image when no real generation succeeded."""
+        logger.warning("Falling back to mock image generation")
+        if MockImageGeneratorTool is None:
+            logger.error("Mock image generator is not available")
+            return None, None, False
+        try:
+            mock_generator = MockImageGeneratorTool()
+            return mock_generator.generate_ice_cream_image(
+                ingredients, scoops, save_to_root, filename_prefix
+            )
+        except Exception as mock_error:
+            logger.error("Mock generation also failed: %s", mock_error)
+            return None, None, False
 
-        # Build stacking description from bottom to top
-        stack_parts = []
+    def _create_ice_cream_spec(
+        self, ingredients: list[str], scoops: int, width: int, height: int
+    ) -> Dict[str, Any]:
+        """Create a detailed specification for ice cream image generation with proper stacking logic.
 
-        for i in range(min(scoops, len(flavors))):
-            if i == 0:
-                stack_parts.append(f"bottom scoop: {flavors[i]}")
-            elif i == scoops - 1:
-                stack_parts.append(f"top scoop: {flavors[i]}")
-            else:
-                stack_parts.append(f"middle scoop {i}: {flavors[i]}")
-
-        # If we have more scoops than flavors, repeat the last flavor
-        if scoops > len(flavors):
-            remaining_scoops = scoops - len(flavors)
-            last_flavor = flavors[-1] if flavors else "vanilla ice cream"
-            for i in range(remaining_scoops):
-                stack_parts.append(f"additional scoop: {last_flavor}")
-
-        return " stacked with ".join(stack_parts)
-
-    def _analyze_ingredients(
-        self, ingredients: list[str]
-    ) -> Tuple[list[str], list[str]]:
-        """Analyze ingredients and categorize into flavors and toppings with proper ordering."""
-        flavors = []
-        liquid_toppings = []
-        solid_toppings = []
-
-        # Enhanced flavor keywords - more specific matches
-        flavor_keywords = [
-            "ice cream",
-            "gelato",
-            "sorbet",
-            "frozen yogurt",
-            "vanilla",
-            "chocolate",
-            "strawberry",
-            "mint",
-            "pistachio",
-            "cookie",
-            "butterscotch",
-            "rocky road",
-            "neapolitan",
-            "rainbow",
-            "tutti frutti",
-            "custard",
-            "sherbet",
-        ]
-
-        # Liquid toppings (applied first)
-        liquid_topping_keywords = [
-            "sauce",
-            "syrup",
-            "drizzle",
-            "fudge",
-            "caramel sauce",
-            "chocolate sauce",
-            "strawberry sauce",
-            "hot fudge",
-            "butterscotch sauce",
-            "whipped cream",
-        ]
-
-        # Solid toppings (applied second)
-        solid_topping_keywords = [
-            "sprinkles",
-            "chips",
-            "chunks",
-            "nuts",
-            "berries",
-            "fruit",
-            "crumble",
-            "wafer",
-            "candies",
-            "gummy",
-            "marshmallow",
-            "graham",
-            "oreo",
-            "brownie",
-            "cherry",
-            "jimmies",
-            "confetti",
-            "coconut",
-        ]
-
-        for ingredient in ingredients:
-            ingredient_lower = ingredient.lower()
-            is_categorized = False
-
-            # Check for liquid toppings FIRST
-            for keyword in liquid_topping_keywords:
-                if keyword in ingredient_lower:
-                    liquid_toppings.append(ingredient)
-                    is_categorized = True
-                    break
-
-            # Then check for solid toppings
-            if not is_categorized:
-                for keyword in solid_topping_keywords:
-                    if keyword in ingredient_lower:
-                        solid_toppings.append(ingredient)
-                        is_categorized = True
-                        break
-
-            # Finally check for flavor keywords if not already categorized
-            if not is_categorized:
-                # Special case: if it contains "ice cream" but also topping words, it's a flavor
-                if "ice cream" in ingredient_lower:
-                    flavors.append(ingredient)
-                    is_categorized = True
-                else:
-                    for keyword in flavor_keywords:
-                        if keyword in ingredient_lower:
-                            flavors.append(ingredient)
-                            is_categorized = True
-                            break
-
-            # Default to flavor if uncategorized
-            if not is_categorized:
-                flavors.append(ingredient)
-
-        # Combine toppings in proper order: liquids first, then solids
-        ordered_toppings = liquid_toppings + solid_toppings
-
-        return flavors, ordered_toppings
-
-    def _get_color_palette(self, flavors: list[str], toppings: list[str]) -> list[str]:
-        """Generate appropriate color palette based on flavors and toppings."""
-        # Base palette for ice cream
-        palette = ["#F7F3E9", "#FFFFFF", "#FFF8DC"]  # Cream, white, beige
-
-        # Add flavor-specific colors
-        for flavor in flavors:
-            flavor_lower = flavor.lower()
-            if "chocolate" in flavor_lower:
-                palette.append("#8B4513")
-            elif "strawberry" in flavor_lower:
-                palette.append("#FFB6C1")
-            elif "mint" in flavor_lower:
-                palette.append("#98FB98")
-            elif "caramel" in flavor_lower:
-                palette.append("#C57A40")
-            elif "pistachio" in flavor_lower:
-                palette.append("#93C572")
-
-        # Add topping-specific colors
-        for topping in toppings:
-            topping_lower = topping.lower()
-            if "chocolate" in topping_lower:
-                palette.append("#3A2B1A")
-            elif "sprinkles" in topping_lower:
-                palette.extend(["#FF6B6B", "#4ECDC4", "#FFE66D"])
-
-        return palette[:6]  # Limit to 6 colors
+        Everything but the seed is memoized per arguments, so a retry with the
+        same ingredients only builds a new output dict.
+        """
+        base = _spec_skeleton(tuple(ingredients), scoops, width, height)
+        return {**base, "output": {**base["output"], "seed": _seed32()}}
 
     def _prompt_from_spec(self, spec: Dict[str, Any]) -> str:
         """Convert specification to detailed prompt with proper stacking and topping order."""
@@ -465,53 +781,45 @@ class ImageGeneratorUltraTool:
         cam = spec["camera"]
         bg = spec["background"]
 
+        fields = {
+            "framing": c["framing"],
+            "shot": c["shot"],
+            "angle": c["angle"],
+            "negative_space": c["negative_space"],
+            "lighting": look["lighting"],
+            "surface_detail": look["surface_detail"],
+            "palette": ", ".join(look.get("color_palette", [])),
+            "background_type": bg["type"],
+            "background_color": bg.get("color", "#FFFFFF"),
+            "focal_length_mm": cam["focal_length_mm"],
+            "aperture_f": cam["aperture_f"],
+        }
+
         # Handle empty cone case
         if s["scoops"] == 0 or s["type"] == "empty_ice_cream_cone":
-            prompt_parts = [
-                "Photorealistic EMPTY waffle ice cream cone with NO ice cream scoops, completely EMPTY and unused.",
-                "ABSOLUTELY NO ice cream, NO scoops, NO toppings, NO food items whatsoever.",
-                "Just a clean, empty, pristine waffle cone standing alone.",
-                "IMPORTANT: The cone must be completely EMPTY with NO ice cream inside or on top.",
-                f"Framing: {c['framing']}, {c['shot']}, angle {c['angle']}, negative space {c['negative_space']}.",
-                f"Lighting: {look['lighting']}. Surface detail: {look['surface_detail']}.",
-                f"Color palette: {', '.join(look.get('color_palette', []))}.",
-                f"Background: {bg['type']} {bg.get('color', '#FFFFFF')}.",
-                f"Camera feel: {cam['focal_length_mm']}mm, f/{cam['aperture_f']}.",
-            ]
+            return EMPTY_CONE_PROMPT_TEMPLATE.format_map(fields)
+
+        # Build complete stacking description with toppings placement
+        if "stacking_order" in s and s["stacking_order"] != "no_scoops":
+            scoop_description = f"Ice cream with {s['stacking_order']} in a WAFFLE CONE (textured waffle pattern cone)"
         else:
-            # Build complete stacking description with toppings placement
-            if "stacking_order" in s and s["stacking_order"] != "no_scoops":
-                scoop_description = f"Ice cream with {s['stacking_order']} in a WAFFLE CONE (textured waffle pattern cone)"
-            else:
-                scoop_description = f"{s['scoops']} scoop(s) of {', '.join(s['flavors'])} stacked in a WAFFLE CONE (textured waffle pattern cone)"
-
-            # Build comprehensive structure description
-            if s.get("toppings"):
-                if s.get("topping_application") == "liquid_first_then_solid":
-                    structure_description = f"Complete structure from bottom to top: waffle cone base → {scoop_description} → toppings applied ON TOP of all scoops in this order: {', '.join(s['toppings'])} (liquid sauces first, then solid toppings on the very top)."
-                else:
-                    structure_description = f"Complete structure: waffle cone base → {scoop_description} → toppings ON TOP: {', '.join(s['toppings'])}."
+            scoop_description = f"{s['scoops']} scoop(s) of {', '.join(s['flavors'])} stacked in a WAFFLE CONE (textured waffle pattern cone)"
+
+        # Build comprehensive structure description
+        if s.get("toppings"):
+            if s.get("topping_application") == "liquid_first_then_solid":
+                structure_description = f"Complete structure from bottom to top: waffle cone base → {scoop_description} → toppings applied ON TOP of all scoops in this order: {', '.join(s['toppings'])} (liquid sauces first, then solid toppings on the very top)."
             else:
-                structure_description = (
-                    f"Structure: waffle cone base → {scoop_description} (no toppings)."
-                )
+                structure_description = f"Complete structure: waffle cone base → {scoop_description} → toppings ON TOP: {', '.join(s['toppings'])}."
+        else:
+            structure_description = (
+                f"Structure: waffle cone base → {scoop_description} (no toppings)."
+            )
 
-            prompt_parts = [
-                f"Photorealistic {s['type'].replace('_', ' ')} with perfect layer structure.",
-                "SINGLE waffle cone only - exactly ONE cone with ALL scoops stacked on top.",
-                structure_description,
-                "MANDATORY: Must be served in a waffle cone with visible waffle texture pattern.",
-                "CRITICAL: Only ONE cone in the entire image - all scoops must be stacked on this single cone.",
-                "IMPORTANT: All toppings must be placed ON TOP of the highest scoop, never between scoops.",
-                f"State: {s['state']}. Perfect stacking with no floating or mixed scoops, toppings only on the very top.",
-                f"Framing: {c['framing']}, {c['shot']}, angle {c['angle']}, negative space {c['negative_space']}.",
-                f"Lighting: {look['lighting']}. Surface detail: {look['surface_detail']}.",
-                f"Color palette: {', '.join(look.get('color_palette', []))}.",
-                f"Background: {bg['type']} {bg.get('color', '#FFFFFF')}.",
-                f"Camera feel: {cam['focal_length_mm']}mm, f/{cam['aperture_f']}.",
-            ]
-
-        return " ".join(prompt_parts)
+        fields["subject_type"] = s["type"].replace("_", " ")
+        fields["structure"] = structure_description
+        fields["state"] = s["state"]
+        return FILLED_CONE_PROMPT_TEMPLATE.format_map(fields)
 
     def _aspect_from_spec(self, spec: Dict[str, Any]) -> str:
         """Extract aspect ratio from spec."""
@@ -524,68 +832,163 @@ class ImageGeneratorUltraTool:
         s = spec.get("output", {}).get("seed")
         return int(s) if isinstance(s, int) and 0 <= s <= 4294967294 else 0
 
-    def _call_ultra(self, spec: Dict[str, Any], prompt_variation: str = "") -> bytes:
-        """Make API call to Stability AI Ultra endpoint."""
+    def _ultra_fields(
+        self, spec: Dict[str, Any], prompt_variation: str = ""
+    ) -> Dict[str, str]:
+        """Build the Ultra form fields for a specification."""
         prompt = self._prompt_from_spec(spec)
         if prompt_variation:
             prompt += f" {prompt_variation}"
 
-        negative = ", ".join(spec.get("negative_prompt", []))
-        aspect_ratio = self._aspect_from_spec(spec)
-        output_format = spec.get("output", {}).get("format", "png").lower()
-        seed = self._seed_from_spec(spec)
+        negative_prompt = spec.get("negative_prompt", ())
+        negative = (
+            _NEGATIVE_PROMPT_TEXT.get(negative_prompt)
+            if isinstance(negative_prompt, tuple)
+            else None
+        )
+        if negative is None:
+            negative = ", ".join(negative_prompt)
 
-        print(f"🎨 Generated prompt: {prompt}")
+        logger.debug("Generated prompt: %s", prompt)
 
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Accept": "image/*",
-        }
+        fields = {"prompt": prompt}
+        if negative:
+            fields["negative_prompt"] = negative
+        fields["aspect_ratio"] = self._aspect_from_spec(spec)
+        fields["output_format"] = spec.get("output", {}).get("format", "png").lower()
+        fields["seed"] = str(self._seed_from_spec(spec))
+        fields["style_preset"] = "photographic"
+        return fields
+
+    def _call_ultra(
+        self,
+        spec: Dict[str, Any],
+        prompt_variation: str = "",
+        sink: Optional[BinaryIO] = None,
+    ) -> Optional[bytes]:
+        """Make API call to Stability AI Ultra endpoint.
 
+        With a sink, the image is streamed into it and None is returned.
+        """
         # Multipart form data
         form = {
-            "prompt": (None, prompt),
-            "negative_prompt": (None, negative) if negative else None,
-            "aspect_ratio": (None, aspect_ratio),
-            "output_format": (None, output_format),
-            "seed": (None, str(seed)),
-            "style_preset": (None, "photographic"),
+            name: (None, value)
+            for name, value in self._ultra_fields(spec, prompt_variation).items()
         }
 
-        # Remove None values
-        form = {k: v for k, v in form.items() if v is not None}
+        with self._session.post(
+            self.ultra_url, files=form, timeout=120, stream=True
+        ) as response:
+            if response.status_code != 200:
+                raise _ultra_error(response.status_code, response.content)
 
-        response = requests.post(
-            self.ultra_url, headers=headers, files=form, timeout=120
-        )
+            if sink is not None:
+                response.raw.decode_content = True
+                shutil.copyfileobj(response.raw, sink, ULTRA_CHUNK_SIZE)
+                return None
+            return _read_body(response)
 
-        if response.status_code != 200:
+    async def _call_ultra_async(
+        self,
+        spec: Dict[str, Any],
+        prompt_variation: str = "",
+        sink: Optional[BinaryIO] = None,
+    ) -> Optional[bytes]:
+        """Make an Ultra API call on the event loop through aiohttp.
+
+        With a sink, the image is streamed into it (writes run on a worker
+        thread) and None is returned.
+        """
+        form = aiohttp.FormData()
+        for name, value in self._ultra_fields(spec, prompt_variation).items():
+            form.add_field(name, value)
+        # A file part makes aiohttp send multipart/form-data, which Ultra needs
+        form.add_field("none", b"", filename="none")
+
+        # Shares the process-wide Stability limit with the Core requests
+        async with (
+            stability_slots,
+            self._get_aio_session().post(self.ultra_url, data=form) as response,
+        ):
+            if response.status != 200:
+                raise _ultra_error(response.status, await response.read())
+
+            if sink is not None:
+                async for chunk in response.content.iter_chunked(ULTRA_CHUNK_SIZE):
+                    await asyncio.to_thread(sink.write, chunk)
+                return None
+            return await response.read()
+
+    def _call_ultra_cached(self, spec: Dict[str, Any]) -> Path:
+        """Call Ultra, reusing the stored image for an identical spec.
+
+        A fresh image is streamed straight into the cache; the cache path is
+        returned either way.
+        """
+        cache_path, hit = self._cached_image(spec)
+        if not hit:
+            part_path = self._cache_part_path(cache_path)
             try:
-                error_json = response.json()
-                raise RuntimeError(
-                    f"Stability API error {response.status_code}: {error_json}"
-                )
-            except Exception:
-                raise RuntimeError(
-                    f"Stability API error {response.status_code}: {response.text[:200]}"
-                )
+                with open(part_path, "wb") as f:
+                    self._call_ultra(spec, sink=f)
+            except BaseException:
+                part_path.unlink(missing_ok=True)
+                raise
+            self._commit_cached(part_path, cache_path)
+        return cache_path
+
+    async def _call_ultra_cached_async(self, spec: Dict[str, Any]) -> Path:
+        """Async counterpart of _call_ultra_cached."""
+        cache_path, hit = await asyncio.to_thread(self._cached_image, spec)
+        if not hit:
+            part_path = await asyncio.to_thread(self._cache_part_path, cache_path)
+            f = await asyncio.to_thread(open, part_path, "wb")
+            try:
+                await self._call_ultra_async(spec, sink=f)
+                await asyncio.to_thread(f.close)
+            except BaseException:
+                f.close()
+                part_path.unlink(missing_ok=True)
+                raise
+            await asyncio.to_thread(self._commit_cached, part_path, cache_path)
+        return cache_path
+
+    def _cached_image(self, spec: Dict[str, Any]) -> Tuple[Path, bool]:
+        """Return a spec's cache path and whether an image is stored there."""
+        fmt = spec.get("output", {}).get("format", "png").lower()
+        cache_path = ULTRA_CACHE_DIR / f"ultra_{_cache_key(spec)}.{fmt}"
+        try:
+            # Refresh the mtime so pruning treats the entry as recently used
+            os.utime(cache_path)
+        except FileNotFoundError:
+            return cache_path, False
 
-        return response.content
+        logger.debug("Reusing cached Stability AI Ultra image: %s", cache_path)
+        return cache_path, True
+
+    def _cache_part_path(self, cache_path: Path) -> Path:
+        """Temporary name a new cache entry is written under."""
+        ULTRA_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        return _part_path(cache_path)
+
+    def _commit_cached(self, part_path: Path, cache_path: Path) -> None:
+        """Move a fully written entry into place and prune old entries."""
+        # The rename means readers never see a partially written entry
+        os.replace(part_path, cache_path)
+        _prune_cache()
 
     def _generate_two_images(
         self, spec: Dict[str, Any], filename_prefix: str, save_to_root: bool
     ) -> Optional[list[str]]:
         """Generate two image variations."""
         try:
-            # Generate first image
-            img1 = self._call_ultra(spec)
+            spec2 = self._variation_spec(spec)
 
-            # Create second spec with different seed and variation
-            spec2 = {**spec}
-            spec2.setdefault("output", {})["seed"] = random.randint(1, 4294967294)
-            img2 = self._call_ultra(
-                spec2, "Subtle variation in drizzle pattern and sprinkle distribution."
-            )
+            # One after the other: this may run on a stability_pool worker that
+            # holds a single slot, and waiting there for a second slot could
+            # deadlock once every slot is held (the async path takes one each)
+            img1 = self._call_ultra(spec)
+            img2 = self._call_ultra(spec2, VARIATION_PROMPT)
 
             # Save both images
             if save_to_root:
@@ -600,50 +1003,131 @@ class ImageGeneratorUltraTool:
             return None
 
         except Exception as e:
-            print(f"❌ Failed to generate image variations: {e}")
+            logger.error("Failed to generate image variations: %s", e)
             return None
 
+    def _variation_spec(self, spec: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy a spec with a new seed for a second variation."""
+        # The copy gets its own output dict so the original keeps its seed
+        spec2 = {**spec}
+        spec2["output"] = {
+            **spec.get("output", {}),
+            "seed": _seed32(),
+        }
+        return spec2
+
     def _save_image_from_bytes(
         self, image_bytes: bytes, filename_prefix: str, spec: Dict[str, Any]
     ) -> str:
         """Save image bytes to file with optional upscaling."""
-        # Optional upscaling
-        image_bytes = self._upscale_if_requested(image_bytes, spec)
+        file_path = self._new_image_path(filename_prefix, spec)
+        part_path = _part_path(file_path)
+        try:
+            # Optional upscaling writes the resized image itself
+            if not self._upscale_if_requested(BytesIO(image_bytes), spec, part_path):
+                # Save image straight to the fd; the bytes are already in
+                # memory, so a buffered file object would only add a copy
+                fd = os.open(
+                    part_path,
+                    os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_CLOEXEC", 0),
+                    0o644,
+                )
+                try:
+                    view = memoryview(image_bytes)
+                    while view:
+                        view = view[os.write(fd, view) :]
+                finally:
+                    os.close(fd)
+            os.replace(part_path, file_path)
+        except BaseException:
+            part_path.unlink(missing_ok=True)
+            raise
+
+        logger.debug("Stability AI Ultra image saved to: %s", file_path)
+        return str(file_path)
+
+    def _save_image_from_cache(
+        self, cache_path: Path, filename_prefix: str, spec: Dict[str, Any]
+    ) -> str:
+        """Save a cached Ultra image to file with optional upscaling."""
+        file_path = self._new_image_path(filename_prefix, spec)
+        part_path = _part_path(file_path)
+        try:
+            # Optional upscaling writes the resized image itself
+            if not self._upscale_if_requested(cache_path, spec, part_path):
+                # An unresized image is the cache file itself; link it if we can
+                part_path.unlink(missing_ok=True)
+                try:
+                    os.link(cache_path, part_path)
+                except OSError:
+                    shutil.copyfile(cache_path, part_path)
+            os.replace(part_path, file_path)
+        except BaseException:
+            part_path.unlink(missing_ok=True)
+            raise
+
+        logger.debug("Stability AI Ultra image saved to: %s", file_path)
+        return str(file_path)
 
-        # Get project root directory
-        project_root = Path(__file__).resolve().parents[2]
+    def _new_image_path(self, filename_prefix: str, spec: Dict[str, Any]) -> Path:
+        """Unique timestamped path in the project root for a generated image.
 
-        # Create filename with timestamp
+        Images are written to a .part file and renamed over this path, so a
+        file already there (possibly a hard link into the cache) is replaced
+        rather than written through.
+        """
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        unique = f"{os.getpid()}_{next(_part_ids)}"
         fmt = spec.get("output", {}).get("format", "png").lower()
-        filename = f"{filename_prefix}_ultra_{timestamp}.{fmt}"
-        file_path = project_root / filename
-
-        # Save image
-        with open(file_path, "wb") as f:
-            f.write(image_bytes)
-
-        print(f"🖼️ Stability AI Ultra image saved to: {file_path}")
-        return str(file_path)
+        return PROJECT_ROOT / f"{filename_prefix}_ultra_{timestamp}_{unique}.{fmt}"
 
-    def _upscale_if_requested(self, img_bytes: bytes, spec: Dict[str, Any]) -> bytes:
-        """Upscale image if specific dimensions are requested."""
+    def _upscale_if_requested(
+        self,
+        source: Union[Path, BinaryIO],
+        spec: Dict[str, Any],
+        file_path: Path,
+    ) -> bool:
+        """Write the image resized to the requested dimensions to file_path.
+
+        Pillow decodes from source and encodes straight into the file.
+        Returns False when no resize is needed (or it failed), leaving the
+        caller to write the original image.
+        """
         out = spec.get("output", {})
         w, h = out.get("width"), out.get("height")
         fmt = out.get("format", "png").lower()
 
-        if w and h:
-            try:
-                img = Image.open(BytesIO(img_bytes))
-                if (img.width, img.height) != (w, h):
-                    img = img.resize((w, h), Image.LANCZOS)
-                    buf = BytesIO()
-                    img.save(buf, format="PNG" if fmt == "png" else "JPEG")
-                    return buf.getvalue()
-            except Exception as e:
-                print(f"⚠️ Upscaling failed, using original: {e}")
-
-        return img_bytes
+        if not (w and h):
+            return False
+        # Ultra's own output size needs no decode at all
+        if NATIVE_ULTRA_SIZES.get(out.get("aspect_ratio", "1:1")) == (w, h):
+            return False
+        # Pillow is only imported once an image actually needs resizing
+        from PIL import Image
+
+        try:
+            with Image.open(source, formats=ULTRA_IMAGE_FORMATS) as img:
+                if (img.width, img.height) == (w, h):
+                    return False
+                # Lets the JPEG decoder scale down while decoding; for other
+                # downscales reducing_gap runs a cheap box reduce before LANCZOS
+                img.draft("RGB", (w, h))
+                img = img.resize((w, h), Image.LANCZOS, reducing_gap=3.0)
+            if fmt == "png":
+                # Fast zlib level: these files are served once, not archived
+                img.save(file_path, format="PNG", compress_level=1, optimize=False)
+            else:
+                img.save(
+                    file_path,
+                    format="JPEG",
+                    quality=90,
+                    progressive=False,
+                    subsampling=2,
+                )
+            return True
+        except Exception as e:
+            logger.warning("Upscaling failed, using original: %s", e)
+            return False
 
 
 # Convenience function for easy integration
@@ -1,13 +1,69 @@
 """Enhanced MCP client for game-based cost calculations."""
 
-import json
-from typing import Dict, List, Optional, Any
-import aiosqlite
-from src.settings import DB_FILE
+import functools
+import re
+from typing import Collection, Dict, Iterable, List, Optional, Any
+import orjson
+from src.database import inventory_cache
+from src.database.connection import get_db
 from src.models.processing_result import CostValidation
 from src.models.game_data import PlayerData, PersonalityProfile
 
 
+@functools.lru_cache(maxsize=256)
+def _like_pattern(text: str) -> "re.Pattern[str]":
+    """Regex matching like SQLite's LOWER(column) LIKE LOWER('%text%').
+
+    LIKE treats ``_`` and ``%`` in the text as wildcards and folds ASCII case
+    only, so both are reproduced here.
+    """
+    wildcards = {"%": ".*", "_": "."}
+    return re.compile(
+        "".join(wildcards.get(char) or re.escape(char) for char in text),
+        re.IGNORECASE | re.ASCII | re.DOTALL,
+    )
+
+
+def _first_like(
+    rows: Iterable[Dict[str, Any]], column: str, text: str
+) -> Optional[Dict[str, Any]]:
+    """First row, in table order, whose column is LIKE '%text%'."""
+    pattern = _like_pattern(text)
+    for row in rows:
+        value = row.get(column)
+        if isinstance(value, str) and pattern.search(value):
+            return row
+    return None
+
+
+def _keyword_row(
+    rows: Iterable[Dict[str, Any]], keyword: str
+) -> Optional[Dict[str, Any]]:
+    """Row whose name matches a keyword, else one whose description does."""
+    return _first_like(rows, "ingredient", keyword) or _first_like(
+        rows, "description", keyword
+    )
+
+
+def _similar_ingredients(rows: Iterable[Dict[str, Any]], selection: str) -> List[str]:
+    """Up to 3 ingredients whose name or description contains the selection."""
+    selection_lower = selection.lower()
+    return [
+        row["ingredient"]
+        for row in rows
+        if selection_lower in row["ingredient"].lower()
+        or selection_lower in (row.get("description") or "").lower()
+    ][:3]
+
+
+def _average_cost(ingredient: Optional[Dict[str, Any]]) -> Optional[float]:
+    """Average of an ingredient's min and max cost (min alone if no max)."""
+    if ingredient and ingredient.get("cost_min") is not None:
+        cost_max = ingredient.get("cost_max") or ingredient.get("cost_min")
+        return (ingredient["cost_min"] + cost_max) / 2
+    return None
+
+
 class MCPClient:
     """Enhanced MCP client for game-based ice cream processing."""
 
@@ -46,137 +102,103 @@ class MCPClient:
         """Initialize MCP client."""
         pass
 
+    async def _inventory_rows(self) -> Collection[Dict[str, Any]]:
+        """Inventory rows in table order, from the in-process snapshot.
+
+        The rows are shared with inventory_cache, so they are only read here;
+        methods returning rows to callers hand out copies.
+        """
+        return (await inventory_cache.get_inventory()).values()
+
     async def get_all_ingredients(self) -> List[Dict[str, Any]]:
         """Get all available ingredients from database."""
-        async with aiosqlite.connect(DB_FILE) as db:
-            cursor = await db.execute("SELECT * FROM inventory")
-            rows = await cursor.fetchall()
-            columns = [column[0] for column in cursor.description]
-            return [dict(zip(columns, row)) for row in rows]
+        return [dict(row) for row in await self._inventory_rows()]
 
     async def get_ingredient_by_name(
         self, ingredient_name: str
     ) -> Optional[Dict[str, Any]]:
         """Get specific ingredient details."""
-        async with aiosqlite.connect(DB_FILE) as db:
-            cursor = await db.execute(
-                "SELECT * FROM inventory WHERE LOWER(ingredient) LIKE LOWER(?)",
-                (f"%{ingredient_name}%",),
-            )
-            row = await cursor.fetchone()
-            if row:
-                columns = [column[0] for column in cursor.description]
-                return dict(zip(columns, row))
-        return None
+        row = _first_like(await self._inventory_rows(), "ingredient", ingredient_name)
+        return dict(row) if row else None
 
     async def map_selection_to_ingredients(self, selection: str) -> List[str]:
         """Map abstract selections like 'Rich', 'Crunchy' to actual ingredients."""
+        return self._selection_ingredients(await self._inventory_rows(), selection)
+
+    async def _find_ingredient_by_keyword(
+        self, keyword: str
+    ) -> Optional[Dict[str, Any]]:
+        """Find ingredient that matches a keyword."""
+        row = _keyword_row(await self._inventory_rows(), keyword)
+        return dict(row) if row else None
+
+    async def _find_similar_ingredients(self, selection: str) -> List[str]:
+        """Find ingredients similar to an unknown selection."""
+        return _similar_ingredients(await self._inventory_rows(), selection)
+
+    def _selection_ingredients(
+        self, rows: Collection[Dict[str, Any]], selection: str
+    ) -> List[str]:
+        """Map a selection to ingredient names using the given inventory rows."""
         selection_lower = selection.lower()
 
         if selection_lower == "skip":
             return []
 
-        if selection_lower not in self.SELECTION_MAPPINGS:
+        mapping = self.SELECTION_MAPPINGS.get(selection_lower)
+        if mapping is None:
             # If selection doesn't match known mappings, try to find similar ingredients
-            return await self._find_similar_ingredients(selection)
+            return _similar_ingredients(rows, selection)
 
-        mapping = self.SELECTION_MAPPINGS[selection_lower]
         ingredients = []
-
-        # Add flavors
-        for flavor in mapping.get("flavors", []):
-            ingredient = await self._find_ingredient_by_keyword(flavor)
-            if ingredient:
-                ingredients.append(ingredient["ingredient"])
-
-        # Add toppings
-        for topping in mapping.get("toppings", []):
-            ingredient = await self._find_ingredient_by_keyword(topping)
+        for keyword in (*mapping.get("flavors", ()), *mapping.get("toppings", ())):
+            ingredient = _keyword_row(rows, keyword)
             if ingredient:
                 ingredients.append(ingredient["ingredient"])
-
         return ingredients
 
-    async def _find_ingredient_by_keyword(
-        self, keyword: str
-    ) -> Optional[Dict[str, Any]]:
-        """Find ingredient that matches a keyword."""
-        async with aiosqlite.connect(DB_FILE) as db:
-            # Try exact match first
-            cursor = await db.execute(
-                "SELECT * FROM inventory WHERE LOWER(ingredient) LIKE LOWER(?)",
-                (f"%{keyword}%",),
-            )
-            row = await cursor.fetchone()
-            if row:
-                columns = [column[0] for column in cursor.description]
-                return dict(zip(columns, row))
-
-            # Try description match
-            cursor = await db.execute(
-                "SELECT * FROM inventory WHERE LOWER(description) LIKE LOWER(?)",
-                (f"%{keyword}%",),
-            )
-            row = await cursor.fetchone()
-            if row:
-                columns = [column[0] for column in cursor.description]
-                return dict(zip(columns, row))
-
-        return None
-
-    async def _find_similar_ingredients(self, selection: str) -> List[str]:
-        """Find ingredients similar to an unknown selection."""
-        ingredients = await self.get_all_ingredients()
-        similar = []
-
-        for ingredient in ingredients:
-            # Check if selection appears in ingredient name or description
-            if (
-                selection.lower() in ingredient["ingredient"].lower()
-                or selection.lower() in (ingredient.get("description", "")).lower()
-            ):
-                similar.append(ingredient["ingredient"])
-
-        return similar[:3]  # Return top 3 matches
-
-    async def get_cost_for_abstract_selection(self, selection: str) -> Dict[str, float]:
-        """Calculate cost for abstract selections like 'Rich' or 'Crunchy'."""
-        ingredients = await self.map_selection_to_ingredients(selection)
+    def _ingredients_cost(
+        self, rows: Collection[Dict[str, Any]], ingredients: List[str]
+    ) -> Dict[str, float]:
+        """Average cost per ingredient name, looked up in the given rows."""
         cost_breakdown = {}
 
         for ingredient_name in ingredients:
-            ingredient = await self.get_ingredient_by_name(ingredient_name)
-            if ingredient and ingredient.get("cost_min") is not None:
-                # Use average of min and max cost, or just min if max is None
-                cost_max = ingredient.get("cost_max") or ingredient.get("cost_min")
-                avg_cost = (ingredient["cost_min"] + cost_max) / 2
+            avg_cost = _average_cost(_first_like(rows, "ingredient", ingredient_name))
+            if avg_cost is not None:
                 cost_breakdown[ingredient_name] = avg_cost
 
         return cost_breakdown
 
+    async def get_cost_for_abstract_selection(self, selection: str) -> Dict[str, float]:
+        """Calculate cost for abstract selections like 'Rich' or 'Crunchy'."""
+        rows = await self._inventory_rows()
+        return self._ingredients_cost(
+            rows, self._selection_ingredients(rows, selection)
+        )
+
     async def calculate_ingredients_cost(
         self, ingredients: List[str]
     ) -> Dict[str, float]:
         """Calculate cost for a list of specific ingredients."""
-        cost_breakdown = {}
-
-        for ingredient_name in ingredients:
-            ingredient = await self.get_ingredient_by_name(ingredient_name)
-            if ingredient and ingredient.get("cost_min") is not None:
-                cost_max = ingredient.get("cost_max") or ingredient.get("cost_min")
-                avg_cost = (ingredient["cost_min"] + cost_max) / 2
-                cost_breakdown[ingredient_name] = avg_cost
-
-        return cost_breakdown
+        return self._ingredients_cost(await self._inventory_rows(), ingredients)
 
     async def calculate_total_cost(self, selections: List[str]) -> CostValidation:
         """Calculate authoritative total cost from backend database (frontend costs ignored)."""
+        return self._total_cost(await self._inventory_rows(), selections)
+
+    def _total_cost(
+        self, rows: Collection[Dict[str, Any]], selections: List[str]
+    ) -> CostValidation:
+        """Total cost of the selections, resolved against the given rows."""
         total_calculated_cost = 0.0
         cost_details = []
 
         for selection in selections:
             if selection.lower() != "skip":
-                selection_costs = await self.get_cost_for_abstract_selection(selection)
+                selection_costs = self._ingredients_cost(
+                    rows, self._selection_ingredients(rows, selection)
+                )
                 total_calculated_cost += sum(selection_costs.values())
                 cost_details.extend(
                     [
@@ -220,12 +242,12 @@ class MCPClient:
             "minimalist": ["vanilla", "simple", "clean"],
         }
 
+        # One snapshot read; every keyword is then matched in memory
+        rows = await self._inventory_rows()
         for trait, ingredients in trait_mappings.items():
             if trait in personality_text:
                 for ingredient_keyword in ingredients:
-                    ingredient = await self._find_ingredient_by_keyword(
-                        ingredient_keyword
-                    )
+                    ingredient = _keyword_row(rows, ingredient_keyword)
                     if (
                         ingredient
                         and ingredient["ingredient"] not in suggested_ingredients
@@ -237,14 +259,15 @@ class MCPClient:
     async def get_allergy_warnings(self, ingredients: List[str]) -> List[str]:
         """Get allergy warnings for a list of ingredients."""
         all_allergies = set()
+        rows = await self._inventory_rows()
 
         for ingredient_name in ingredients:
-            ingredient = await self.get_ingredient_by_name(ingredient_name)
+            ingredient = _first_like(rows, "ingredient", ingredient_name)
             if ingredient and ingredient.get("allergies"):
                 try:
-                    allergies = json.loads(ingredient["allergies"])
+                    allergies = orjson.loads(ingredient["allergies"])
                     all_allergies.update(allergies)
-                except (json.JSONDecodeError, TypeError):
+                except (orjson.JSONDecodeError, TypeError):
                     # Handle non-JSON allergy data
                     allergy_str = str(ingredient["allergies"]).strip("[]'\"")
                     if allergy_str:
@@ -257,42 +280,31 @@ class MCPClient:
     ) -> Dict[str, float]:
         """Calculate authoritative costs for multiple players (frontend costs ignored)."""
         player_costs = {}
+        # One inventory read shared by every player
+        rows = await self._inventory_rows()
 
         for player in players:
-            cost_calculation = await self.calculate_total_cost(player.selections)
+            cost_calculation = self._total_cost(rows, player.selections)
             player_costs[player.id] = cost_calculation.calculated_cost
 
         return player_costs
 
     async def get_available_flavors(self) -> List[str]:
         """Get all available flavors from used_on field."""
-        async with aiosqlite.connect(DB_FILE) as db:
-            cursor = await db.execute(
-                "SELECT used_on FROM inventory WHERE used_on != '[]'"
-            )
-            rows = await cursor.fetchall()
-
-            all_flavors = set()
-            for row in rows:
-                try:
-                    flavors = json.loads(row[0])
-                    all_flavors.update(flavors)
-                except (json.JSONDecodeError, TypeError):
-                    # Handle non-JSON data
-                    flavor_str = row[0].strip("[]'\"")
-                    if flavor_str:
-                        all_flavors.add(flavor_str)
-
-            return list(all_flavors)
+        return list(await inventory_cache.get_flavours())
 
     async def decrease_ingredient_inventory(
         self, ingredient_name: str, amount: int = 1
     ) -> bool:
         """Decrease inventory for an ingredient."""
-        async with aiosqlite.connect(DB_FILE) as db:
-            cursor = await db.execute(
-                "UPDATE inventory SET inventory = inventory - ? WHERE ingredient = ? AND inventory >= ?",
-                (amount, ingredient_name, amount),
-            )
-            await db.commit()
-            return cursor.rowcount > 0
+        db = await get_db()
+        cursor = await db.execute(
+            "UPDATE inventory SET inventory = inventory - ? WHERE ingredient = ? AND inventory >= ? RETURNING inventory",
+            (amount, ingredient_name, amount),
+        )
+        row = await cursor.fetchone()
+        await db.commit()
+        if row is None:
+            return False
+        inventory_cache.set_inventory(ingredient_name, row[0])
+        return True
@@ -0,0 +1,28 @@
+"""Concurrency limit shared by every Stability AI request in the process."""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+import src.settings
+
+# Blocking Stability calls made from async code run on this dedicated pool, and
+# every call (blocking or aiohttp, Core or Ultra) takes a slot, so bursts queue
+# here instead of exhausting Starlette's threadpool or tripping Stability's 429s
+stability_pool = ThreadPoolExecutor(
+    max_workers=src.settings.STABILITY_CONCURRENCY, thread_name_prefix="stability"
+)
+stability_slots = asyncio.Semaphore(src.settings.STABILITY_CONCURRENCY)
+
+ResultT = TypeVar("ResultT")
+
+
+async def run_in_stability_pool(
+    func: Callable[..., ResultT], *args: Any, **kwargs: Any
+) -> ResultT:
+    """Run a blocking Stability call on the pool once a slot is free."""
+    async with stability_slots:
+        return await asyncio.get_running_loop().run_in_executor(
+            stability_pool, functools.partial(func, *args, **kwargs)
+        )
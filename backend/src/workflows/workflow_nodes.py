@@ -11,7 +11,7 @@ from src.agents.game_data_adapter import GameDataAdapterAgent
 from src.agents.selection_mapping import SelectionMappingAgent
 from src.agents.cost_calculator import CostCalculatorAgent
 from src.tools.mcp_client import MCPClient
-from src.tools.image_generator import ImageGeneratorTool
+from src.tools.image_generator import get_image_generator
 
 
 class IceCreamWorkflowNodes:
@@ -23,7 +23,7 @@ class IceCreamWorkflowNodes:
         self.selection_mapper = SelectionMappingAgent()
         self.cost_calculator = CostCalculatorAgent()
         self.mcp_client = MCPClient()
-        self.image_generator = ImageGeneratorTool()
+        self.image_generator = get_image_generator()
 
     # Method aliases for workflow compatibility
     async def initialize_processing(self, state, config):
@@ -436,13 +436,11 @@ class IceCreamWorkflowNodes:
             )
 
             # Generate the image
-            image_url, local_path, success = (
-                self.image_generator.generate_ice_cream_image(
-                    ingredients=ingredients,
-                    scoops=scoops,
-                    save_to_root=True,
-                    filename_prefix=filename_prefix,
-                )
+            image_url, local_path, success = await self.image_generator.generate_pooled(
+                ingredients=ingredients,
+                scoops=scoops,
+                save_to_root=True,
+                filename_prefix=filename_prefix,
             )
 
             # Store image generation results